@@ -0,0 +1,191 @@
+"""
+Message Catalog Analyzer
+Fast AST-based analysis of messages_XX.py files: reports duplicate keys, keys missing
+per language and placeholder mismatches, and benchmarks the message loaders
+
+Usage:
+    python -m CONFIG.LANGUAGES.catalog_analyzer              # consistency report
+    python -m CONFIG.LANGUAGES.catalog_analyzer --benchmark  # loader benchmark
+"""
+
+import os
+import sys
+import ast
+import time
+import tracemalloc
+from typing import Dict, Any, List
+
+from CONFIG.LANGUAGES.message_catalogs import load_catalog, save_catalog
+from CONFIG.LANGUAGES.message_templates import compile_templates, find_placeholder_mismatches
+
+_UNEVALUATED = object()
+
+
+class FileAnalysis(object):
+    """Result of AST analysis of one messages file"""
+
+    def __init__(self, messages_path: str):
+        self.messages_path = messages_path
+        self.messages = {}          # key -> last assigned value
+        self.lines = {}             # key -> list of line numbers where key is assigned
+        self.unevaluated = []       # keys whose value is not a literal
+
+    @property
+    def duplicates(self) -> Dict[str, List[int]]:
+        """Keys assigned more than once, with line numbers of all assignments"""
+        return {key: lines for key, lines in self.lines.items() if len(lines) > 1}
+
+
+def _evaluate_value(node: ast.AST) -> Any:
+    """Evaluate literal value of assignment, f-strings without expressions are supported"""
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        pass
+    if isinstance(node, ast.JoinedStr) and all(isinstance(value, ast.Constant) for value in node.values):
+        return ''.join(str(value.value) for value in node.values)
+    return _UNEVALUATED
+
+
+def analyze_messages_file(messages_path: str, class_name: str = 'Messages') -> FileAnalysis:
+    """Analyze Messages class body of messages file without importing it"""
+    analysis = FileAnalysis(messages_path)
+    with open(messages_path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=messages_path)
+
+    messages_class = None
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            messages_class = node
+            break
+    if messages_class is None:
+        return analysis
+
+    for node in messages_class.body:
+        if isinstance(node, ast.Assign):
+            targets, value_node = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value_node = [node.target], node.value
+        else:
+            continue
+        value = _evaluate_value(value_node)
+        for target in targets:
+            if not isinstance(target, ast.Name):
+                continue
+            analysis.lines.setdefault(target.id, []).append(node.lineno)
+            if value is _UNEVALUATED:
+                analysis.unevaluated.append(target.id)
+                analysis.messages.pop(target.id, None)
+            else:
+                analysis.messages[target.id] = value
+    return analysis
+
+
+def analyze_catalogs(router=None) -> Dict[str, Any]:
+    """
+    Analyze all available languages against the default language
+    Returns report dict: language code -> duplicates, missing, extra, placeholder_mismatches, unevaluated
+    """
+    if router is None:
+        from CONFIG.LANGUAGES.language_router import language_router as router
+
+    analyses = {}
+    for language_code, messages_file in router.available_languages.items():
+        analyses[language_code] = analyze_messages_file(os.path.join(router.languages_dir, messages_file))
+
+    base = analyses[router.default_language]
+    base_templates = compile_templates(base.messages)
+    report = {}
+    for language_code, analysis in analyses.items():
+        keys = set(analysis.lines)
+        base_keys = set(base.lines)
+        templates = compile_templates(analysis.messages)
+        report[language_code] = {
+            'file': os.path.basename(analysis.messages_path),
+            'keys': len(keys),
+            'duplicates': analysis.duplicates,
+            'missing': sorted(base_keys - keys),
+            'extra': sorted(keys - base_keys),
+            'placeholder_mismatches': find_placeholder_mismatches(
+                templates, base_templates, keys & set(base.messages) & set(analysis.messages)
+            ),
+            'unevaluated': analysis.unevaluated,
+        }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    """Print analyzer report"""
+    for language_code, result in report.items():
+        print(f"[{language_code}] {result['file']}: {result['keys']} keys")
+        print(f"  duplicates: {len(result['duplicates'])}")
+        for key, lines in sorted(result['duplicates'].items()):
+            print(f"    {key}: lines {', '.join(str(line) for line in lines)}")
+        print(f"  missing: {len(result['missing'])}")
+        for key in result['missing']:
+            print(f"    {key}")
+        print(f"  extra: {len(result['extra'])}")
+        for key in result['extra']:
+            print(f"    {key}")
+        print(f"  placeholder mismatches: {len(result['placeholder_mismatches'])}")
+        for key, fields, base_fields in result['placeholder_mismatches']:
+            print(f"    {key}: {sorted(fields)} != {sorted(base_fields)}")
+        if result['unevaluated']:
+            print(f"  not literal: {', '.join(result['unevaluated'])}")
+
+
+def _measure(loader, repeat: int) -> Dict[str, float]:
+    """Measure best time and peak traced memory of loader"""
+    best_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader()
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+    tracemalloc.start()
+    try:
+        result = loader()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'time_ms': best_time * 1000, 'peak_kb': peak / 1024, 'keys': len(result or {})}
+
+
+def benchmark_loaders(router=None, repeat: int = 5) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Benchmark AST, import and precompiled loaders for all available languages
+    Returns dict: language code -> loader name -> time_ms, peak_kb, keys
+    """
+    if router is None:
+        from CONFIG.LANGUAGES.language_router import language_router as router
+
+    results = {}
+    for language_code, messages_file in router.available_languages.items():
+        messages_path = os.path.join(router.languages_dir, messages_file)
+        # Make sure precompiled catalog exists for current source
+        if load_catalog(messages_path) is None:
+            save_catalog(messages_path, router._load_messages_with_import(messages_path))
+        results[language_code] = {
+            'analyzer': _measure(lambda: analyze_messages_file(messages_path).messages, repeat),
+            'ast': _measure(lambda: router._load_messages_with_ast(messages_path), repeat),
+            'import': _measure(lambda: router._load_messages_with_import(messages_path), repeat),
+            'precompiled': _measure(lambda: load_catalog(messages_path), repeat),
+        }
+    return results
+
+
+def print_benchmark(results: Dict[str, Dict[str, Dict[str, float]]]):
+    """Print loader benchmark results"""
+    print(f"{'lang':<6}{'loader':<14}{'time, ms':>10}{'peak, KB':>12}{'keys':>8}")
+    for language_code, loaders in results.items():
+        for loader_name, result in loaders.items():
+            print(f"{language_code:<6}{loader_name:<14}{result['time_ms']:>10.2f}"
+                  f"{result['peak_kb']:>12.1f}{result['keys']:>8}")
+
+
+if __name__ == '__main__':
+    if '--benchmark' in sys.argv[1:]:
+        print_benchmark(benchmark_loaders())
+    else:
+        print_report(analyze_catalogs())
@@ -6,11 +6,18 @@ Handles dynamic loading of messages based on user's selected language
 import os
 import sys
 import ast
+import time
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 
 # Add the parent directory to the path to import CONFIG
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from CONFIG.LANGUAGES.message_catalogs import MessageCatalog, get_source_key, load_catalog, save_catalog
+from CONFIG.LANGUAGES.message_templates import CompiledTemplate, compile_templates, find_placeholder_mismatches
+from CONFIG.LANGUAGES.user_preferences import UserPreferencesStore
+
 class LanguageRouter:
     """Router for handling multi-language message loading"""
     
@@ -24,57 +31,206 @@ class LanguageRouter:
         }
         self.default_language = 'en'
         self._cached_messages = {}
+        self._cached_templates = {}
+        
+        # Catalog hot-reload: messages file mtime at load time, checked by one background watcher
+        self._catalog_mtimes = {}
+        self._catalog_lock = threading.RLock()
+        self._catalog_watcher = None
+        self._catalog_watcher_stop = threading.Event()
+        
+        # User preferences live in one SQLite store instead of ./users/<id>/lang.txt files,
+        # lang.txt of users not yet in the store is imported on first read
+        self.preferences = UserPreferencesStore()
+        
+        # Per-user language cache: user_id -> (lang_code, last check time)
+        # Entries are trusted for user_lang_cache_ttl seconds, after that the preferences
+        # store is queried again (catches edits made outside this process)
+        self.user_lang_cache_size = 10000
+        self.user_lang_cache_ttl = 60  # in seconds
+        self._user_lang_cache = OrderedDict()
+        self._user_lang_lock = threading.Lock()
         
+    def _get_lang_file(self, user_id: int) -> str:
+        """Get path to user's legacy lang.txt file"""
+        return os.path.join(f'./users/{str(user_id)}', 'lang.txt')
+    
+    def _remember_user_language(self, user_id: int, lang_code: str):
+        """Store user's language in the LRU cache, evicting the oldest entries"""
+        with self._user_lang_lock:
+            self._user_lang_cache[user_id] = (lang_code, time.monotonic())
+            self._user_lang_cache.move_to_end(user_id)
+            while len(self._user_lang_cache) > self.user_lang_cache_size:
+                self._user_lang_cache.popitem(last=False)
+    
+    def _read_lang_file(self, lang_file: str) -> Optional[str]:
+        """
+        Read legacy lang.txt file
+        Returns None if file does not exist or holds an unknown language
+        """
+        try:
+            with open(lang_file, 'r', encoding='utf-8') as f:
+                lang_code = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if lang_code not in self.available_languages:
+            return None
+        return lang_code
+    
+    def _read_legacy_user_language(self, user_id: int, lang_file: str = None) -> Optional[str]:
+        """
+        Read user's legacy lang.txt file and import it into preferences store
+        Returns None if user has no lang.txt
+        """
+        if lang_file is None:
+            lang_file = self._get_lang_file(user_id)
+        lang_code = self._read_lang_file(lang_file)
+        if lang_code is None:
+            return None
+        # Insert only if absent: a concurrent set_user_language() must win over stale lang.txt
+        return self.preferences.set_if_absent(user_id, 'lang', lang_code)
+    
     def get_user_language(self, user_id: int) -> str:
         """
-        Get user's selected language from lang.txt file in user directory
+        Get user's selected language from preferences store
         Returns default language if not set
+        Results are cached in memory, the store is only queried again after TTL expires
         """
+        with self._user_lang_lock:
+            cached = self._user_lang_cache.get(user_id)
+            if cached is not None and time.monotonic() - cached[1] < self.user_lang_cache_ttl:
+                self._user_lang_cache.move_to_end(user_id)
+                return cached[0]
+        
         try:
-            user_dir = f'./users/{str(user_id)}'
-            lang_file = os.path.join(user_dir, 'lang.txt')
-            
-            if os.path.exists(lang_file):
-                with open(lang_file, 'r', encoding='utf-8') as f:
-                    lang_code = f.read().strip()
-                    if lang_code in self.available_languages:
-                        return lang_code
+            lang_code = self.preferences.get(user_id, 'lang')
+            if lang_code is None:
+                lang_code = self._read_legacy_user_language(user_id)
+            if lang_code not in self.available_languages:
+                lang_code = self.default_language
         except Exception as e:
             print(f"Error reading user language for {user_id}: {e}")
+            return self.default_language
+        
+        self._remember_user_language(user_id, lang_code)
+        return lang_code
+    
+    def get_user_languages(self, user_ids) -> Dict[Any, str]:
+        """
+        Get languages of many users at once (e.g. for broadcasts)
+        Users missing from cache are resolved with one batched store query,
+        users not in the store yet are looked up with a single os.scandir pass over ./users
+        Returns dict of user_id -> language code
+        """
+        result = {}
+        pending = {}
+        now = time.monotonic()
+        with self._user_lang_lock:
+            for user_id in user_ids:
+                cached = self._user_lang_cache.get(user_id)
+                if cached is not None and now - cached[1] < self.user_lang_cache_ttl:
+                    result[user_id] = cached[0]
+                else:
+                    pending[str(user_id)] = user_id
+        
+        if not pending:
+            return result
+        
+        resolved = {}
+        try:
+            resolved = self.preferences.get_many('lang', pending.values())
+        except Exception as e:
+            print(f"Error reading user languages: {e}")
+        
+        legacy = {name: user_id for name, user_id in pending.items() if user_id not in resolved}
+        if legacy:
+            imported = {}
+            try:
+                with os.scandir('./users') as entries:
+                    for entry in entries:
+                        user_id = legacy.get(entry.name)
+                        if user_id is None or not entry.is_dir():
+                            continue
+                        try:
+                            lang_code = self._read_lang_file(os.path.join(entry.path, 'lang.txt'))
+                        except Exception as e:
+                            print(f"Error reading user language for {user_id}: {e}")
+                            continue
+                        if lang_code is not None:
+                            imported[user_id] = lang_code
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Error scanning user languages: {e}")
+            
+            if imported:
+                resolved.update(imported)
+                try:
+                    # One transaction for all imported files, insert only if absent so a concurrent
+                    # set_user_language() wins over stale lang.txt, then read back what is stored
+                    self.preferences.set_many('lang', imported, overwrite=False)
+                    resolved.update(self.preferences.get_many('lang', imported))
+                except Exception as e:
+                    print(f"Error importing user languages: {e}")
         
-        return self.default_language
+        for user_id in pending.values():
+            lang_code = resolved.get(user_id, self.default_language)
+            if lang_code not in self.available_languages:
+                lang_code = self.default_language
+            self._remember_user_language(user_id, lang_code)
+            result[user_id] = lang_code
+        return result
+    
+    def group_users_by_language(self, user_ids) -> Dict[str, list]:
+        """
+        Group users by language so a broadcast can render each message once per language
+        Returns dict of language code -> list of user_ids
+        """
+        groups = {}
+        for user_id, lang_code in self.get_user_languages(user_ids).items():
+            groups.setdefault(lang_code, []).append(user_id)
+        return groups
     
     def set_user_language(self, user_id: int, language_code: str) -> bool:
         """
-        Set user's language preference by saving to lang.txt file
+        Set user's language preference by saving it to preferences store
         Returns True if successful, False if language not supported
         """
         if language_code not in self.available_languages:
             return False
             
         try:
-            # Create user directory if it doesn't exist
-            user_dir = f'./users/{str(user_id)}'
-            os.makedirs(user_dir, exist_ok=True)
+            self.preferences.set(user_id, 'lang', language_code)
             
-            # Save language preference to lang.txt
-            lang_file = os.path.join(user_dir, 'lang.txt')
-            with open(lang_file, 'w', encoding='utf-8') as f:
-                f.write(language_code)
-            
-            # Clear cache for this user to force reload with new language
-            if language_code in self._cached_messages:
-                del self._cached_messages[language_code]
+            # Write through to the per-user language cache
+            self._remember_user_language(user_id, language_code)
             
             return True
         except Exception as e:
             print(f"Error saving user language for {user_id}: {e}")
             return False
     
-    def load_messages(self, language_code: str = None) -> Dict[str, Any]:
+    def migrate_user_languages(self, users_dir: str = './users') -> int:
+        """
+        Import existing ./users/<id>/lang.txt files into preferences store
+        Returns number of imported users
+        """
+        try:
+            imported = self.preferences.migrate_files(
+                'lang.txt', 'lang', users_dir, allowed_values=self.available_languages
+            )
+            self.clear_user_language_cache()
+            return imported
+        except Exception as e:
+            print(f"Error migrating user languages: {e}")
+            return 0
+    
+    def load_messages(self, language_code: str = None) -> MessageCatalog:
         """
         Load messages for specified language
         Falls back to default language if specified language not found
+        Languages are loaded lazily on first use and cached as read-only MessageCatalog shared by all users,
+        non-default catalogs only store messages that differ from the default language catalog
         """
         if language_code is None:
             language_code = self.default_language
@@ -86,26 +242,141 @@ class LanguageRouter:
         # Validate language code
         if language_code not in self.available_languages:
             language_code = self.default_language
+            if language_code in self._cached_messages:
+                return self._cached_messages[language_code]
             
-        # Load messages file
-        messages_file = self.available_languages[language_code]
-        messages_path = os.path.join(self.languages_dir, messages_file)
-        
         try:
-            # Load messages using import method (more reliable)
-            messages_dict = self._load_messages_with_import(messages_path)
+            with self._catalog_lock:
+                # Another thread could load the language while we were waiting
+                if language_code in self._cached_messages:
+                    return self._cached_messages[language_code]
+                
+                fallback = None
+                if language_code != self.default_language:
+                    fallback = self.load_messages(self.default_language)
+                catalog, templates, mtime = self._build_catalog(language_code, fallback)
+                
+                # Cache the messages
+                self._cached_templates[language_code] = templates
+                self._cached_messages[language_code] = catalog
+                self._catalog_mtimes[language_code] = mtime
             
-            # Cache the messages
-            self._cached_messages[language_code] = messages_dict
-            
-            return messages_dict
+            return catalog
             
         except Exception as e:
             print(f"Error loading messages for language {language_code}: {e}")
             # Fall back to default language
             if language_code != self.default_language:
                 return self.load_messages(self.default_language)
-            return {}
+            return MessageCatalog(language_code, {})
+    
+    def _build_catalog(self, language_code: str, fallback: Optional[MessageCatalog]):
+        """
+        Build catalog and compiled templates for language without touching the caches
+        Returns (catalog, templates, messages file mtime)
+        """
+        messages_file = self.available_languages[language_code]
+        messages_path = os.path.join(self.languages_dir, messages_file)
+        mtime = os.stat(messages_path).st_mtime
+        
+        # Load precompiled catalog, import method is used only when source changed
+        messages_dict = self._load_messages_precompiled(messages_path)
+        if not messages_dict:
+            raise ValueError(f"no messages found in {messages_file}")
+        
+        catalog = MessageCatalog(language_code, messages_dict, fallback)
+        
+        # Compile templates of own layer once and check placeholders against default language,
+        # messages equal to default language reuse its templates
+        templates = compile_templates(catalog.own_messages)
+        if fallback is not None:
+            mismatches = find_placeholder_mismatches(
+                templates, self._cached_templates.get(self.default_language, {}), catalog.own_messages.keys()
+            )
+            for key, fields, base_fields in mismatches:
+                print(f"Placeholder mismatch in {messages_file} for {key}: "
+                      f"{sorted(fields)} != {sorted(base_fields)} in default language")
+                # Mismatched translations are rendered with default language template
+                templates.pop(key, None)
+        
+        return catalog, templates, mtime
+    
+    def reload_language(self, language_code: str) -> bool:
+        """
+        Rebuild catalog of a loaded language from its messages file and swap it in
+        Reloading default language also rebuilds all languages layered on it
+        Returns True if successful
+        """
+        if language_code not in self.available_languages:
+            return False
+        
+        try:
+            with self._catalog_lock:
+                fallback = None
+                if language_code != self.default_language:
+                    fallback = self.load_messages(self.default_language)
+                catalog, templates, mtime = self._build_catalog(language_code, fallback)
+                self._cached_templates[language_code] = templates
+                self._cached_messages[language_code] = catalog
+                self._catalog_mtimes[language_code] = mtime
+                
+                if language_code == self.default_language:
+                    for dependent_code in list(self._cached_messages):
+                        if dependent_code != self.default_language:
+                            dependent, templates, mtime = self._build_catalog(dependent_code, catalog)
+                            self._cached_templates[dependent_code] = templates
+                            self._cached_messages[dependent_code] = dependent
+                            self._catalog_mtimes[dependent_code] = mtime
+            
+            print(f"Reloaded messages for language {language_code}")
+            return True
+        except Exception as e:
+            print(f"Error reloading messages for language {language_code}: {e}")
+            return False
+    
+    def check_catalogs(self) -> list:
+        """
+        Reload loaded catalogs whose messages file mtime changed
+        Returns list of reloaded language codes
+        """
+        reloaded = []
+        for language_code, loaded_mtime in list(self._catalog_mtimes.items()):
+            messages_path = os.path.join(self.languages_dir, self.available_languages[language_code])
+            try:
+                mtime = os.stat(messages_path).st_mtime
+            except OSError:
+                continue
+            if mtime != loaded_mtime and self.reload_language(language_code):
+                reloaded.append(language_code)
+        return reloaded
+    
+    def start_catalog_watcher(self, interval: float = 10) -> bool:
+        """
+        Start background thread that hot-reloads changed catalogs every interval seconds
+        Returns False if watcher is already running
+        """
+        if self._catalog_watcher is not None and self._catalog_watcher.is_alive():
+            return False
+        
+        self._catalog_watcher_stop.clear()
+        
+        def watch():
+            while not self._catalog_watcher_stop.wait(interval):
+                try:
+                    self.check_catalogs()
+                except Exception as e:
+                    print(f"Error in catalog watcher: {e}")
+        
+        self._catalog_watcher = threading.Thread(target=watch, name='catalog-watcher', daemon=True)
+        self._catalog_watcher.start()
+        return True
+    
+    def stop_catalog_watcher(self):
+        """Stop background catalog watcher"""
+        self._catalog_watcher_stop.set()
+        if self._catalog_watcher is not None:
+            self._catalog_watcher.join(timeout=5)
+            self._catalog_watcher = None
     
     def get_message(self, message_key: str, user_id: int = None, language_code: str = None) -> str:
         """
@@ -117,7 +388,48 @@ class LanguageRouter:
             language_code = self.default_language
             
         messages = self.load_messages(language_code)
-        return messages.get(message_key, f"[{message_key}]")
+        return messages.get(message_key)
+    
+    def memory_footprint(self) -> Dict[str, Any]:
+        """
+        Get approximate memory used by loaded message catalogs
+        Non-default languages only store messages that differ from the default language
+        """
+        languages = {}
+        for language_code, catalog in list(self._cached_messages.items()):
+            footprint = catalog.memory_footprint()
+            footprint['templates'] = len(self._cached_templates.get(language_code, {}))
+            languages[language_code] = footprint
+        return {
+            'languages': languages,
+            'loaded': sorted(languages),
+            'total_bytes': sum(footprint['bytes'] for footprint in languages.values()),
+        }
+    
+    def get_template(self, message_key: str, user_id: int = None, language_code: str = None) -> Optional[CompiledTemplate]:
+        """
+        Get compiled template for a message with placeholders
+        Falls back to default language template, returns None if message has no placeholders
+        """
+        if language_code is None and user_id is not None:
+            language_code = self.get_user_language(user_id)
+        elif language_code is None:
+            language_code = self.default_language
+            
+        catalog = self.load_messages(language_code)
+        template = self._cached_templates.get(catalog.language_code, {}).get(message_key)
+        if template is None and catalog.language_code != self.default_language:
+            template = self._cached_templates.get(self.default_language, {}).get(message_key)
+        return template
+    
+    def format_message(self, message_key: str, user_id: int = None, language_code: str = None, **kwargs) -> str:
+        """
+        Get a specific message formatted with kwargs using precompiled template
+        """
+        template = self.get_template(message_key, user_id, language_code)
+        if template is None:
+            return self.get_message(message_key, user_id, language_code)
+        return template.render(**kwargs)
     
     def get_available_languages(self) -> Dict[str, str]:
         """
@@ -207,6 +519,26 @@ class LanguageRouter:
             # Fall back to import method
             return self._load_messages_with_import(messages_path)
     
+    def _load_messages_precompiled(self, messages_path: str) -> Dict[str, Any]:
+        """
+        Load messages from precompiled catalog keyed by source mtime and size
+        Rebuilds the catalog with import method if messages file was changed
+        """
+        try:
+            source_key = get_source_key(messages_path)
+        except Exception as e:
+            print(f"Error reading messages file {messages_path}: {e}")
+            return self._load_messages_with_import(messages_path)
+        
+        messages_dict = load_catalog(messages_path, source_key)
+        if messages_dict:
+            return messages_dict
+        
+        messages_dict = self._load_messages_with_import(messages_path)
+        if messages_dict:
+            save_catalog(messages_path, messages_dict, source_key)
+        return messages_dict
+    
     def _load_messages_with_import(self, messages_path: str) -> Dict[str, Any]:
         """
         Fallback method using import to load messages
@@ -301,12 +633,23 @@ class LanguageRouter:
     
     def clear_cache(self):
         """Clear cached messages"""
-        self._cached_messages.clear()
+        with self._catalog_lock:
+            self._cached_messages.clear()
+            self._cached_templates.clear()
+            self._catalog_mtimes.clear()
+    
+    def clear_user_language_cache(self, user_id: int = None):
+        """Clear cached user language (for one user or for all users)"""
+        with self._user_lang_lock:
+            if user_id is None:
+                self._user_lang_cache.clear()
+            else:
+                self._user_lang_cache.pop(user_id, None)
 
 # Global instance
 language_router = LanguageRouter()
 
-def get_messages(user_id: int = None, language_code: str = None) -> Dict[str, Any]:
+def get_messages(user_id: int = None, language_code: str = None) -> MessageCatalog:
     """
     Convenience function to get messages for user or language
     """
@@ -323,6 +666,18 @@ def get_message(message_key: str, user_id: int = None, language_code: str = None
     """
     return language_router.get_message(message_key, user_id, language_code)
 
+def group_users_by_language(user_ids) -> Dict[str, list]:
+    """
+    Convenience function to group users by their language
+    """
+    return language_router.group_users_by_language(user_ids)
+
+def format_message(message_key: str, user_id: int = None, language_code: str = None, **kwargs) -> str:
+    """
+    Convenience function to get a specific message formatted with kwargs
+    """
+    return language_router.format_message(message_key, user_id, language_code, **kwargs)
+
 def set_user_language(user_id: int, language_code: str) -> bool:
     """
     Convenience function to set user language
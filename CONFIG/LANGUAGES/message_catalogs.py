@@ -0,0 +1,245 @@
+"""
+Precompiled Message Catalogs
+Serializes Messages classes into compact marshal catalogs keyed by source mtime and size
+(like .pyc validation, the source is not read to find its catalog),
+so the language router does not need to re-import messages_XX.py on every start.
+Loaded catalogs are wrapped in read-only MessageCatalog objects shared by all users
+
+Build step (optional, catalogs are also built on first load):
+    python -m CONFIG.LANGUAGES.message_catalogs
+"""
+
+import os
+import sys
+import marshal
+from collections import Counter
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Any, Optional
+
+CATALOGS_DIR_NAME = '.catalogs'
+CATALOG_EXTENSION = '.marshal'
+
+_MISSING = object()
+
+
+class MessageCatalog(Mapping):
+    """
+    Read-only message table for one language
+    Supports dict-style (catalog.get(key), catalog[key]) and attribute-style (catalog.KEY) access.
+    Catalogs are layered: with a fallback (English) catalog only messages that differ from it are
+    stored, everything else is read from the fallback. Keys not translated at all are counted in missing_keys
+    """
+
+    __slots__ = ('language_code', '_messages', '_fallback', '_untranslated', '_missing_keys', '_placeholders')
+
+    def __init__(self, language_code: str, messages: Dict[str, Any], fallback: 'MessageCatalog' = None):
+        own_messages = {}
+        base_messages = fallback._messages if fallback is not None else {}
+        for key, value in messages.items():
+            if isinstance(value, str):
+                value = sys.intern(value)
+            if base_messages.get(key, _MISSING) != value:
+                own_messages[sys.intern(key)] = value
+        object.__setattr__(self, 'language_code', language_code)
+        object.__setattr__(self, '_messages', own_messages)
+        object.__setattr__(self, '_fallback', fallback)
+        object.__setattr__(self, '_untranslated', frozenset(key for key in base_messages if key not in messages))
+        object.__setattr__(self, '_missing_keys', Counter())
+        object.__setattr__(self, '_placeholders', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MessageCatalog is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("MessageCatalog is read-only")
+
+    def _lookup(self, key: str) -> Any:
+        """Get message from this layer or fallback catalog, _MISSING if key is not found anywhere"""
+        value = self._messages.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self._fallback is not None:
+            value = self._fallback._messages.get(key, _MISSING)
+            if value is not _MISSING and key in self._untranslated:
+                self._missing_keys[key] += 1
+        return value
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        """
+        Get message by key, falling back to English catalog
+        Returns default (or "[KEY]" placeholder if no default given) when key is not found anywhere
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        self._missing_keys[key] += 1
+
+        if default is not _MISSING:
+            return default
+        placeholder = self._placeholders.get(key)
+        if placeholder is None:
+            placeholder = self._placeholders.setdefault(key, f"[{key}]")
+        return placeholder
+
+    def __getattr__(self, key: str) -> Any:
+        # Only called for names that are not slots, i.e. message keys
+        if key.startswith('_'):
+            raise AttributeError(key)
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise AttributeError(key)
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._messages or (self._fallback is not None and key in self._fallback._messages)
+
+    def __iter__(self):
+        yield from self._messages
+        if self._fallback is not None:
+            for key in self._fallback._messages:
+                if key not in self._messages:
+                    yield key
+
+    def __len__(self) -> int:
+        if self._fallback is None:
+            return len(self._messages)
+        return len(self._messages) + sum(1 for key in self._fallback._messages if key not in self._messages)
+
+    def __repr__(self) -> str:
+        return f"<MessageCatalog {self.language_code}: {len(self._messages)} own messages>"
+
+    @property
+    def missing_keys(self) -> Counter:
+        """Counter of keys that were requested but not found in this language"""
+        return self._missing_keys
+
+    @property
+    def own_messages(self) -> Mapping:
+        """Messages stored in this layer (differing from fallback catalog)"""
+        return MappingProxyType(self._messages)
+
+    def memory_footprint(self) -> Dict[str, Any]:
+        """
+        Get approximate memory used by this layer
+        Returns dict with own_keys, inherited_keys, untranslated_keys and bytes (dict + own values)
+        """
+        size = sys.getsizeof(self._messages)
+        for key, value in self._messages.items():
+            if self._fallback is None:
+                size += sys.getsizeof(key)
+            size += sys.getsizeof(value)
+            if isinstance(value, (list, tuple)):
+                size += sum(sys.getsizeof(item) for item in value)
+        inherited = 0
+        if self._fallback is not None:
+            inherited = sum(1 for key in self._fallback._messages if key not in self._messages)
+        return {
+            'own_keys': len(self._messages),
+            'inherited_keys': inherited,
+            'untranslated_keys': len(self._untranslated),
+            'bytes': size,
+        }
+
+
+def get_catalogs_dir(messages_path: str) -> str:
+    """Get directory where precompiled catalogs are stored"""
+    return os.path.join(os.path.dirname(os.path.abspath(messages_path)), CATALOGS_DIR_NAME)
+
+
+def get_source_key(messages_path: str) -> str:
+    """Get key of messages_XX.py source from its mtime and size (includes marshal format version)"""
+    stat = os.stat(messages_path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}-{marshal.version}"
+
+
+def get_catalog_path(messages_path: str, source_key: str) -> str:
+    """Get path of precompiled catalog for given messages file and source key"""
+    messages_name = os.path.splitext(os.path.basename(messages_path))[0]
+    return os.path.join(get_catalogs_dir(messages_path), f"{messages_name}.{source_key}{CATALOG_EXTENSION}")
+
+
+def load_catalog(messages_path: str, source_key: str = None) -> Optional[Dict[str, Any]]:
+    """
+    Load precompiled catalog for messages file
+    Returns None if there is no catalog for the current source
+    """
+    try:
+        if source_key is None:
+            source_key = get_source_key(messages_path)
+        catalog_path = get_catalog_path(messages_path, source_key)
+        try:
+            with open(catalog_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # marshal.load() on a file object reads it in many small chunks, loads() of one read is much faster
+        messages_dict = marshal.loads(data)
+        if not isinstance(messages_dict, dict):
+            return None
+        return messages_dict
+    except Exception as e:
+        print(f"Error loading precompiled catalog for {messages_path}: {e}")
+        return None
+
+
+def save_catalog(messages_path: str, messages_dict: Dict[str, Any], source_key: str = None) -> bool:
+    """
+    Save messages dict as precompiled catalog and remove stale catalogs of the same file
+    Returns True if successful
+    """
+    try:
+        if source_key is None:
+            source_key = get_source_key(messages_path)
+        catalogs_dir = get_catalogs_dir(messages_path)
+        os.makedirs(catalogs_dir, exist_ok=True)
+        catalog_path = get_catalog_path(messages_path, source_key)
+
+        # Write to temp file first so concurrent readers never see a partial catalog
+        tmp_path = f"{catalog_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump(messages_dict, f)
+        os.replace(tmp_path, catalog_path)
+
+        # Remove catalogs built from older sources
+        messages_name = os.path.splitext(os.path.basename(messages_path))[0]
+        for file_name in os.listdir(catalogs_dir):
+            if (file_name.startswith(f"{messages_name}.") and file_name.endswith(CATALOG_EXTENSION)
+                    and os.path.join(catalogs_dir, file_name) != catalog_path):
+                try:
+                    os.remove(os.path.join(catalogs_dir, file_name))
+                except OSError:
+                    pass
+        return True
+    except Exception as e:
+        print(f"Error saving precompiled catalog for {messages_path}: {e}")
+        return False
+
+
+def build_catalogs(router=None) -> Dict[str, bool]:
+    """
+    Build precompiled catalogs for all available languages
+    Returns dict of language code -> True if catalog was built
+    """
+    if router is None:
+        from CONFIG.LANGUAGES.language_router import language_router as router
+
+    results = {}
+    for language_code, messages_file in router.available_languages.items():
+        messages_path = os.path.join(router.languages_dir, messages_file)
+        messages_dict = router._load_messages_with_import(messages_path)
+        results[language_code] = bool(messages_dict) and save_catalog(messages_path, messages_dict)
+    return results
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    for language_code, built in build_catalogs().items():
+        print(f"{language_code}: {'built' if built else 'FAILED'}")
@@ -0,0 +1,86 @@
+"""
+Compiled Message Templates
+Parses messages with {field} placeholders once per language into literal and field
+segments, renders them through a precomputed fast path and validates translations against English
+"""
+
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
+
+_formatter = Formatter()
+
+
+class CompiledTemplate(object):
+    """Message template parsed into literal and field segments"""
+
+    __slots__ = ('source', 'segments', 'fields', '_printf')
+
+    def __init__(self, source: str):
+        self.source = source
+        # Each segment is (literal_text, field_name, format_spec, conversion), field_name is None for tail text
+        self.segments = tuple(_formatter.parse(source))
+        self.fields = frozenset(field for _, field, _, _ in self.segments if field is not None)
+        # Templates with plain {name} fields only are rendered as a printf-style "%(name)s" string,
+        # which is noticeably cheaper than str.format for every progress tick
+        self._printf = None
+        if all(field is None or (field.isidentifier() and not spec and not conversion)
+               for _, field, spec, conversion in self.segments):
+            self._printf = ''.join(
+                literal.replace('%', '%%') + (f"%({field})s" if field is not None else '')
+                for literal, field, _, _ in self.segments
+            )
+
+    def render(self, **kwargs) -> str:
+        """Render template, raises KeyError for missing fields like str.format"""
+        if self._printf is None:
+            return self.source.format(**kwargs)
+        return self._printf % kwargs
+
+    def __repr__(self) -> str:
+        return f"<CompiledTemplate fields={sorted(self.fields)}>"
+
+
+def compile_template(message: Any) -> Optional[CompiledTemplate]:
+    """
+    Compile message into template
+    Returns None if message is not a string with placeholders
+    """
+    if not isinstance(message, str) or '{' not in message:
+        return None
+    try:
+        template = CompiledTemplate(message)
+    except ValueError:
+        # Unbalanced braces, message is not meant to be formatted
+        return None
+    if not template.fields:
+        return None
+    return template
+
+
+def compile_templates(messages: Dict[str, Any]) -> Dict[str, CompiledTemplate]:
+    """Compile all messages with placeholders"""
+    templates = {}
+    for key, message in messages.items():
+        template = compile_template(message)
+        if template is not None:
+            templates[key] = template
+    return templates
+
+
+def find_placeholder_mismatches(templates: Dict[str, CompiledTemplate],
+                                base_templates: Dict[str, CompiledTemplate],
+                                keys=None) -> List[Tuple[str, frozenset, frozenset]]:
+    """
+    Compare placeholder sets of translation with base (English) templates
+    Only keys present in the translation (or given keys) are checked
+    Returns list of (key, translation fields, base fields) for keys that differ
+    """
+    mismatches = []
+    for key in sorted(keys if keys is not None else templates):
+        template = templates.get(key)
+        base_template = base_templates.get(key)
+        fields = template.fields if template is not None else frozenset()
+        base_fields = base_template.fields if base_template is not None else frozenset()
+        if fields != base_fields:
+            mismatches.append((key, fields, base_fields))
+    return mismatches
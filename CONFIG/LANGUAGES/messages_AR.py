@@ -557,6 +557,11 @@ class Messages(object):
     
     # Other handlers messages
     AUDIO_WAIT_MSG = "⏰ انتظر حتى ينتهي التحميل السابق"
+    QUEUE_POSITION_MSG = "⏳ التحميل الخاص بك في قائمة الانتظار: الموضع {position} من {total}. سيبدأ تلقائياً."
+    QUEUE_FULL_MSG = "⏳ هناك الكثير من التحميلات في الانتظار (الحد الأقصى {limit}). يرجى المحاولة لاحقاً."
+    QUEUE_DURATION_LIMIT_MSG = "❌ مدة الفيديو تتجاوز الحد الأقصى {limit} ثانية."
+    QUEUE_PLAYLIST_LIMIT_MSG = "❌ عدد العناصر المطلوبة كبير جداً: {count}، الحد الأقصى {limit}."
+    QUEUE_CANCELLED_MSG = "❌ تم إلغاء التحميل الخاص بك في قائمة الانتظار."
     AUDIO_HELP_MSG = (
         "<b>🎧 أمر تحميل الصوت</b>\n\n"
         "الاستخدام: <code>/audio URL</code>\n\n"
@@ -768,6 +773,7 @@ class Messages(object):
         "• مواقع بدون ملفات تعريف ارتباط: {no_cookie_domains}"
     )
     ADMIN_ERROR_RELOADING_PORN_MSG = "❌ خطأ في إعادة تحميل تخزين المحتوى غير المناسب: {error}"
+    ADMIN_URL_CACHE_STATS_MSG = "📊 ذاكرة تصنيف الروابط: {hits} إصابة / {misses} إخفاق (نسبة الإصابة {hit_rate}%)، {size} إدخال، إصدار القوائم {version}"
     ADMIN_CHECK_PORN_USAGE_MSG = "❌ يرجى تقديم رابط للفحص.\nالاستخدام: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECK_PORN_INVALID_URL_MSG = "❌ يرجى تقديم رابط صحيح.\nالاستخدام: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECKING_URL_MSG = "🔍 جاري فحص الرابط للمحتوى غير المناسب...\n<code>{url}</code>"
@@ -558,6 +558,11 @@ Use:
     
     # Other handlers messages
     AUDIO_WAIT_MSG = "⏰ WAIT UNTIL YOUR PREVIOUS DOWNLOAD IS FINISHED"
+    QUEUE_POSITION_MSG = "⏳ Your download is queued: position {position} of {total}. It will start automatically."
+    QUEUE_FULL_MSG = "⏳ Too many downloads are waiting ({limit} max). Please try again later."
+    QUEUE_DURATION_LIMIT_MSG = "❌ The video duration exceeds the {limit} sec limit."
+    QUEUE_PLAYLIST_LIMIT_MSG = "❌ Too many items requested: {count}, the limit is {limit}."
+    QUEUE_CANCELLED_MSG = "❌ Your queued download was cancelled."
     AUDIO_HELP_MSG = (
         "<b>🎧 Audio Download Command</b>\n\n"
         "Usage: <code>/audio URL</code>\n\n"
@@ -769,6 +774,7 @@ Use:
         "• NO_COOKIE_DOMAINS: {no_cookie_domains}"
     )
     ADMIN_ERROR_RELOADING_PORN_MSG = "❌ Error reloading porn cache: {error}"
+    ADMIN_URL_CACHE_STATS_MSG = "📊 URL classification cache: {hits} hits / {misses} misses ({hit_rate}% hit rate), {size} entries, lists version {version}"
     ADMIN_CHECK_PORN_USAGE_MSG = "❌ Please provide a URL to check.\nUsage: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECK_PORN_INVALID_URL_MSG = "❌ Please provide a valid URL.\nUsage: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECKING_URL_MSG = "🔍 Checking URL for NSFW content...\n<code>{url}</code>"
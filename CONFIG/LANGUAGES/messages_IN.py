@@ -557,6 +557,11 @@ class Messages(object):
     
     # Other handlers messages
     AUDIO_WAIT_MSG = "⏰ अपना पिछला डाउनलोड समाप्त होने तक प्रतीक्षा करें"
+    QUEUE_POSITION_MSG = "⏳ आपका डाउनलोड कतार में है: स्थान {position} / {total}। यह अपने आप शुरू होगा।"
+    QUEUE_FULL_MSG = "⏳ बहुत सारे डाउनलोड प्रतीक्षा में हैं (अधिकतम {limit})। कृपया बाद में पुनः प्रयास करें।"
+    QUEUE_DURATION_LIMIT_MSG = "❌ वीडियो की अवधि {limit} सेकंड की सीमा से अधिक है।"
+    QUEUE_PLAYLIST_LIMIT_MSG = "❌ बहुत अधिक आइटम अनुरोधित: {count}, सीमा {limit} है।"
+    QUEUE_CANCELLED_MSG = "❌ कतार में आपका डाउनलोड रद्द कर दिया गया।"
     AUDIO_HELP_MSG = (
         "<b>🎧 ऑडियो डाउनलोड कमांड</b>\n\n"
         "उपयोग: <code>/audio URL</code>\n\n"
@@ -768,6 +773,7 @@ class Messages(object):
         "• NO_COOKIE_DOMAINS: {no_cookie_domains}"
     )
     ADMIN_ERROR_RELOADING_PORN_MSG = "❌ पोर्न कैश रीलोड करने में त्रुटि: {error}"
+    ADMIN_URL_CACHE_STATS_MSG = "📊 URL वर्गीकरण कैश: {hits} हिट / {misses} मिस ({hit_rate}% हिट दर), {size} प्रविष्टियाँ, सूची संस्करण {version}"
     ADMIN_CHECK_PORN_USAGE_MSG = "❌ कृपया जांच के लिए URL प्रदान करें।\nउपयोग: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECK_PORN_INVALID_URL_MSG = "❌ कृपया एक वैध URL प्रदान करें।\nउपयोग: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECKING_URL_MSG = "🔍 NSFW सामग्री के लिए URL जांच रहा है...\n<code>{url}</code>"
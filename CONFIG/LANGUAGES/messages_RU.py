@@ -557,6 +557,11 @@ class Messages(object):
     
     # Other handlers messages
     AUDIO_WAIT_MSG = "⏰ ЖДИТЕ ПОКА ВАША ПРЕДЫДУЩАЯ ЗАГРУЗКА НЕ ЗАВЕРШИТСЯ"
+    QUEUE_POSITION_MSG = "⏳ Ваша загрузка в очереди: позиция {position} из {total}. Она начнётся автоматически."
+    QUEUE_FULL_MSG = "⏳ Слишком много загрузок в ожидании (максимум {limit}). Пожалуйста, попробуйте позже."
+    QUEUE_DURATION_LIMIT_MSG = "❌ Длительность видео превышает лимит {limit} сек."
+    QUEUE_PLAYLIST_LIMIT_MSG = "❌ Запрошено слишком много элементов: {count}, лимит {limit}."
+    QUEUE_CANCELLED_MSG = "❌ Ваша загрузка в очереди была отменена."
     AUDIO_HELP_MSG = (
         "<b>🎧 Команда загрузки аудио</b>\n\n"
         "Использование: <code>/audio URL</code>\n\n"
@@ -768,6 +773,7 @@ class Messages(object):
         "• ДОМЕНЫ_БЕЗ_КУКИ: {no_cookie_domains}"
     )
     ADMIN_ERROR_RELOADING_PORN_MSG = "❌ Ошибка перезагрузки кэша порно: {error}"
+    ADMIN_URL_CACHE_STATS_MSG = "📊 Кэш классификации URL: {hits} попаданий / {misses} промахов ({hit_rate}% попаданий), {size} записей, версия списков {version}"
     ADMIN_CHECK_PORN_USAGE_MSG = "❌ Пожалуйста, предоставьте URL для проверки.\nИспользование: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECK_PORN_INVALID_URL_MSG = "❌ Пожалуйста, предоставьте действительный URL.\nИспользование: <code>/check_porn &lt;URL&gt;</code>"
     ADMIN_CHECKING_URL_MSG = "🔍 Проверка URL на NSFW контент...\n<code>{url}</code>"
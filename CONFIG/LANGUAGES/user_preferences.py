@@ -0,0 +1,183 @@
+"""
+User Preferences Store
+Compact SQLite (WAL mode) store for per-user settings that used to live in tiny
+files under ./users/<id>/ (lang.txt etc.), plus migration of the existing files
+
+Migration of existing lang.txt files:
+    python -m CONFIG.LANGUAGES.user_preferences --migrate
+"""
+
+import os
+import sys
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Iterable
+
+DEFAULT_USERS_DIR = './users'
+DEFAULT_DB_NAME = 'preferences.db'
+
+# SQLite limits number of bound parameters per query
+_QUERY_CHUNK_SIZE = 500
+
+
+class UserPreferencesStore(object):
+    """Key-value store of user preferences: (user_id, key) -> value"""
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            db_path = os.path.join(DEFAULT_USERS_DIR, DEFAULT_DB_NAME)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open connection lazily, so importing the router never touches the disk"""
+        if self._connection is None:
+            db_dir = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(db_dir, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS preferences ('
+                'user_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                'PRIMARY KEY (user_id, key)) WITHOUT ROWID'
+            )
+            self._connection = connection
+        return self._connection
+
+    def get(self, user_id, key: str) -> Optional[str]:
+        """Get user preference, returns None if not set"""
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT value FROM preferences WHERE user_id = ? AND key = ?', (str(user_id), key)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def get_many(self, key: str, user_ids: Iterable) -> Dict[Any, str]:
+        """
+        Get preference of many users at once
+        Returns dict of user_id -> value for users that have the preference set
+        """
+        by_str = {str(user_id): user_id for user_id in user_ids}
+        ids = list(by_str)
+        result = {}
+        with self._lock:
+            connection = self._connect()
+            for start in range(0, len(ids), _QUERY_CHUNK_SIZE):
+                chunk = ids[start:start + _QUERY_CHUNK_SIZE]
+                rows = connection.execute(
+                    f"SELECT user_id, value FROM preferences WHERE key = ? "
+                    f"AND user_id IN ({', '.join('?' * len(chunk))})",
+                    [key, *chunk]
+                )
+                for user_id, value in rows:
+                    result[by_str[user_id]] = value
+        return result
+
+    def set(self, user_id, key: str, value: str):
+        """Set user preference"""
+        with self._lock:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO preferences (user_id, key, value) VALUES (?, ?, ?)',
+                (str(user_id), key, str(value))
+            )
+
+    def set_if_absent(self, user_id, key: str, value: str) -> str:
+        """
+        Set user preference only if it is not set yet (used by migration, so a value
+        imported from a legacy file never replaces one the user has just chosen)
+        Returns value stored after the call
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                'INSERT OR IGNORE INTO preferences (user_id, key, value) VALUES (?, ?, ?)',
+                (str(user_id), key, str(value))
+            )
+            row = connection.execute(
+                'SELECT value FROM preferences WHERE user_id = ? AND key = ?', (str(user_id), key)
+            ).fetchone()
+        return row[0] if row is not None else str(value)
+
+    def set_many(self, key: str, values: Dict[Any, str], overwrite: bool = True) -> int:
+        """
+        Set preference for many users in one transaction
+        With overwrite=False users that already have the preference keep it
+        Returns number of written rows
+        """
+        statement = 'INSERT OR REPLACE' if overwrite else 'INSERT OR IGNORE'
+        with self._lock:
+            connection = self._connect()
+            changes = connection.total_changes
+            connection.execute('BEGIN')
+            try:
+                connection.executemany(
+                    f'{statement} INTO preferences (user_id, key, value) VALUES (?, ?, ?)',
+                    [(str(user_id), key, str(value)) for user_id, value in values.items()]
+                )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            return connection.total_changes - changes
+
+    def delete(self, user_id, key: str = None):
+        """Delete one preference of user, or all of them if key is None"""
+        with self._lock:
+            if key is None:
+                self._connect().execute('DELETE FROM preferences WHERE user_id = ?', (str(user_id),))
+            else:
+                self._connect().execute(
+                    'DELETE FROM preferences WHERE user_id = ? AND key = ?', (str(user_id), key)
+                )
+
+    def migrate_files(self, file_name: str, key: str, users_dir: str = DEFAULT_USERS_DIR,
+                      overwrite: bool = False, allowed_values: Iterable = None) -> int:
+        """
+        Import ./users/<id>/<file_name> files into the store under key
+        Existing values in the store are kept unless overwrite is True,
+        values not in allowed_values (if given) are skipped
+        Returns number of imported values
+        """
+        if allowed_values is not None:
+            allowed_values = set(allowed_values)
+        values = {}
+        try:
+            with os.scandir(users_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    try:
+                        with open(os.path.join(entry.path, file_name), 'r', encoding='utf-8') as f:
+                            value = f.read().strip()
+                    except FileNotFoundError:
+                        continue
+                    except Exception as e:
+                        print(f"Error reading {file_name} for {entry.name}: {e}")
+                        continue
+                    if value and (allowed_values is None or value in allowed_values):
+                        values[entry.name] = value
+        except FileNotFoundError:
+            return 0
+
+        if not values:
+            return 0
+        # INSERT OR IGNORE: a value set concurrently (e.g. /lang during migration) is never replaced
+        return self.set_many(key, values, overwrite=overwrite)
+
+    def close(self):
+        """Close database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+if __name__ == '__main__':
+    if '--migrate' in sys.argv[1:]:
+        from CONFIG.LANGUAGES.language_router import language_router
+        print(f"Imported {language_router.migrate_user_languages()} lang.txt files "
+              f"into {language_router.preferences.db_path}")
+    else:
+        print(__doc__)
@@ -0,0 +1,202 @@
+# Bloom Filter
+# Optional prefilter in front of the porn domain check: answers "definitely not listed"
+# for most hosts (YouTube, TikTok, Instagram...) without touching the full domain list.
+# Filter is persisted next to PORN_DOMAINS_FILE and rebuilt whenever the lists are refreshed
+
+import os
+import math
+import struct
+import hashlib
+import threading
+from typing import Iterable, Optional
+
+from CONFIG.domains import DomainsConfig
+from CONFIG.porn_domain_index import build_domain_index, read_domains, PornDomainIndex
+
+BLOOM_MAGIC = b'PDBLM01\n'
+BLOOM_EXTENSION = '.bloom'
+_HEADER = struct.Struct('<8sQIQ')  # magic, bits, hashes, items
+_MASK_64 = (1 << 64) - 1
+
+
+def get_bloom_path(txt_path: str = None) -> str:
+    """Get Bloom filter path for domains TXT file"""
+    if txt_path is None:
+        txt_path = DomainsConfig.PORN_DOMAINS_FILE
+    return txt_path + BLOOM_EXTENSION
+
+
+class BloomFilter(object):
+    """Bloom filter sized for expected number of items and false-positive rate"""
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01, bits: int = None, hashes: int = None):
+        capacity = max(capacity, 1)
+        if bits is None:
+            bits = max(int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))), 8)
+        if hashes is None:
+            hashes = max(int(round(bits / capacity * math.log(2))), 1)
+        self.bits = bits
+        self.hashes = hashes
+        self.items = 0
+        self._data = bytearray((bits + 7) // 8)
+
+    def _positions(self, key: bytes):
+        """Bit positions of key (double hashing over one 128-bit digest)"""
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=16).digest(), 'little')
+        first = digest & _MASK_64
+        second = (digest >> 64) | 1
+        bits = self.bits
+        return [(first + i * second) % bits for i in range(self.hashes)]
+
+    def add(self, item: str):
+        """Add item to filter"""
+        data = self._data
+        for position in self._positions(item.encode('utf-8')):
+            data[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, item: str) -> bool:
+        # Positions are computed one by one, most absent items are rejected by the first probes
+        digest = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest(), 'little')
+        position = digest & _MASK_64
+        step = (digest >> 64) | 1
+        data = self._data
+        bits = self.bits
+        for _ in range(self.hashes):
+            bit = position % bits
+            if not data[bit >> 3] & (1 << (bit & 7)):
+                return False
+            position += step
+        return True
+
+    @property
+    def expected_fp_rate(self) -> float:
+        """False-positive rate expected for current number of items"""
+        return (1 - math.exp(-self.hashes * self.items / self.bits)) ** self.hashes
+
+    def save(self, path: str):
+        """Save filter atomically"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(BLOOM_MAGIC, self.bits, self.hashes, self.items))
+            f.write(self._data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        """Load filter saved with save()"""
+        with open(path, 'rb') as f:
+            magic, bits, hashes, items = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != BLOOM_MAGIC:
+                raise ValueError(f"Not a Bloom filter: {path}")
+            bloom = cls(max(items, 1), bits=bits, hashes=hashes)
+            bloom.items = items
+            bloom._data = bytearray(f.read())
+        if len(bloom._data) != (bits + 7) // 8:
+            raise ValueError(f"Truncated Bloom filter: {path}")
+        return bloom
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], fp_rate: float = 0.01) -> 'BloomFilter':
+        """Build filter for items"""
+        items = list(items)
+        bloom = cls(len(items), fp_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+
+def build_porn_bloom(txt_path: str = None, fp_rate: float = None) -> int:
+    """
+    Build Bloom filter from PORN_DOMAINS_FILE and save it next to it
+    Returns number of domains in filter
+    """
+    if txt_path is None:
+        txt_path = DomainsConfig.PORN_DOMAINS_FILE
+    if fp_rate is None:
+        fp_rate = DomainsConfig.PORN_BLOOM_FP_RATE
+    bloom = BloomFilter.from_items(set(read_domains(txt_path)), fp_rate)
+    bloom.save(get_bloom_path(txt_path))
+    return bloom.items
+
+
+def refresh_porn_indexes(txt_path: str = None):
+    """
+    Rebuild domain index and Bloom filter after UPDATE_PORN_SCRIPT_PATH refreshed the lists
+    """
+    if txt_path is None:
+        txt_path = DomainsConfig.PORN_DOMAINS_FILE
+    build_domain_index(txt_path)
+    if DomainsConfig.PORN_BLOOM_ENABLED:
+        build_porn_bloom(txt_path)
+
+
+class PrefilteredDomainIndex(object):
+    """Porn domain index with optional Bloom filter prefilter and hit/miss counters"""
+
+    def __init__(self, index: PornDomainIndex, bloom: Optional[BloomFilter] = None):
+        self.index = index
+        self.bloom = bloom
+        self._lock = threading.Lock()
+        self.bloom_negatives = 0       # hosts rejected by Bloom filter (index not touched)
+        self.bloom_positives = 0       # hosts passed to index by Bloom filter
+        self.false_positives = 0       # passed by Bloom filter but not found in index
+        self.index_hits = 0
+
+    def match_host(self, host: str) -> Optional[str]:
+        """
+        Check host and all of its parent domains
+        Returns matched domain or None
+        """
+        bloom = self.bloom
+        if bloom is not None and host:
+            labels = host.lower().rstrip('.').split('.')
+            if not any('.'.join(labels[index:]) in bloom for index in range(len(labels))):
+                with self._lock:
+                    self.bloom_negatives += 1
+                return None
+        matched = self.index.match_host(host)
+        with self._lock:
+            if bloom is not None:
+                self.bloom_positives += 1
+                if matched is None:
+                    self.false_positives += 1
+            if matched is not None:
+                self.index_hits += 1
+        return matched
+
+    def reload(self, txt_path: str = None):
+        """Reload index and Bloom filter from disk"""
+        self.index.reload()
+        if DomainsConfig.PORN_BLOOM_ENABLED:
+            self.bloom = load_porn_bloom(txt_path)
+
+    def stats(self) -> dict:
+        """Get prefilter counters"""
+        with self._lock:
+            checked = self.bloom_negatives + self.bloom_positives
+            return {
+                'bloom_enabled': self.bloom is not None,
+                'bloom_negatives': self.bloom_negatives,
+                'bloom_positives': self.bloom_positives,
+                'false_positives': self.false_positives,
+                'index_hits': self.index_hits,
+                'bloom_skip_rate': self.bloom_negatives / checked if checked else 0.0,
+            }
+
+
+def load_porn_bloom(txt_path: str = None) -> Optional[BloomFilter]:
+    """Load Bloom filter for PORN_DOMAINS_FILE, building it if missing or outdated"""
+    if txt_path is None:
+        txt_path = DomainsConfig.PORN_DOMAINS_FILE
+    bloom_path = get_bloom_path(txt_path)
+    try:
+        if os.path.exists(txt_path) and (
+            not os.path.exists(bloom_path) or os.path.getmtime(bloom_path) < os.path.getmtime(txt_path)
+        ):
+            build_porn_bloom(txt_path)
+        if os.path.exists(bloom_path):
+            return BloomFilter.load(bloom_path)
+    except Exception as e:
+        print(f"Error loading porn domain Bloom filter: {e}")
+    return None
@@ -0,0 +1,153 @@
+# Domain Classifier
+# All DomainsConfig domain lists compiled into one reversed-label trie:
+# one lookup per URL returns bitmask of every list the host belongs to
+
+import enum
+from urllib.parse import urlsplit
+from typing import Dict, Iterable
+
+from CONFIG.domains import DomainsConfig
+
+
+class DomainCategory(enum.IntFlag):
+    """Domain lists of DomainsConfig as bit flags"""
+    NONE = 0
+    WHITELIST = enum.auto()
+    GREYLIST = enum.auto()
+    BLACK_LIST = enum.auto()
+    CLEAN_QUERY = enum.auto()
+    TIKTOK = enum.auto()
+    PROXY = enum.auto()
+    PROXY_2 = enum.auto()
+    NO_COOKIE = enum.auto()
+    NO_FILTER = enum.auto()
+    GALLERYDL_ONLY = enum.auto()
+    GALLERYDL_FALLBACK = enum.auto()
+
+
+# DomainsConfig attribute -> category
+CONFIG_LISTS = {
+    'WHITELIST': DomainCategory.WHITELIST,
+    'GREYLIST': DomainCategory.GREYLIST,
+    'BLACK_LIST': DomainCategory.BLACK_LIST,
+    'CLEAN_QUERY': DomainCategory.CLEAN_QUERY,
+    'TIKTOK_DOMAINS': DomainCategory.TIKTOK,
+    'PROXY_DOMAINS': DomainCategory.PROXY,
+    'PROXY_2_DOMAINS': DomainCategory.PROXY_2,
+    'NO_COOKIE_DOMAINS': DomainCategory.NO_COOKIE,
+    'NO_FILTER_DOMAINS': DomainCategory.NO_FILTER,
+    'GALLERYDL_ONLY_DOMAINS': DomainCategory.GALLERYDL_ONLY,
+    'GALLERYDL_FALLBACK_DOMAINS': DomainCategory.GALLERYDL_FALLBACK,
+}
+
+
+def normalize_host(host: str) -> str:
+    """Lowercase host and strip port, userinfo and trailing dot"""
+    host = host.strip().lower()
+    if '@' in host:
+        host = host.rsplit('@', 1)[1]
+    if host.startswith('['):
+        # IPv6 literal, "[::1]:8080" -> "::1"
+        return host[1:].split(']', 1)[0]
+    if ':' in host:
+        host = host.split(':', 1)[0]
+    return host.rstrip('.')
+
+
+def get_url_host(url: str) -> str:
+    """Get normalized host of URL (URLs without scheme are supported)"""
+    url = url.strip()
+    if '//' not in url:
+        url = '//' + url
+    try:
+        host = urlsplit(url).netloc
+    except ValueError:
+        return ''
+    return normalize_host(host)
+
+
+class DomainClassifier(object):
+    """
+    Reversed-label trie over domain lists
+    An entry matches its own host and all subdomains ("tiktok.com" matches "vm.tiktok.com" but not "nottiktok.com").
+    Entries without a dot (e.g. "pornhub" in BLACK_LIST) match any host label equal to them
+    """
+
+    def __init__(self, lists: Dict[DomainCategory, Iterable[str]] = None):
+        # Trie node is [mask of entries ending here, {label: child node}],
+        # (trie root, dotless label masks) are kept in one tuple so swap() replaces both at once
+        self._tables = ([0, {}], {})
+        self.entries = 0
+        for category, domains in (lists or {}).items():
+            for domain in domains:
+                self.add(domain, category)
+
+    @classmethod
+    def from_config(cls, config=DomainsConfig) -> 'DomainClassifier':
+        """Compile all domain lists of config"""
+        return cls({
+            category: getattr(config, attribute, None) or []
+            for attribute, category in CONFIG_LISTS.items()
+        })
+
+    def add(self, domain: str, category: DomainCategory):
+        """Add domain to category"""
+        domain = normalize_host(domain)
+        if not domain:
+            return
+        self.entries += 1
+        node, label_masks = self._tables
+        if '.' not in domain:
+            label_masks[domain] = label_masks.get(domain, 0) | category
+            return
+        for label in reversed(domain.split('.')):
+            children = node[1]
+            child = children.get(label)
+            if child is None:
+                child = children[label] = [0, {}]
+            node = child
+        node[0] |= category
+
+    def swap(self, other: 'DomainClassifier'):
+        """Atomically replace lists with lists compiled into other classifier"""
+        self._tables = other._tables
+        self.entries = other.entries
+
+    def classify_host(self, host: str) -> DomainCategory:
+        """Get categories of host (host should be normalized)"""
+        mask = 0
+        node, label_masks = self._tables
+        labels = host.split('.')
+        for label in reversed(labels):
+            node = node[1].get(label)
+            if node is None:
+                break
+            mask |= node[0]
+        if label_masks:
+            for label in labels:
+                mask |= label_masks.get(label, 0)
+        return DomainCategory(mask)
+
+    def classify(self, url: str) -> DomainCategory:
+        """Get categories of URL host"""
+        return self.classify_host(get_url_host(url))
+
+    def match(self, url: str, category: DomainCategory) -> bool:
+        """Check if URL host belongs to any of given categories"""
+        return bool(self.classify(url) & category)
+
+    def categories(self, url: str) -> set:
+        """Get names of categories of URL host, e.g. {'whitelist', 'clean_query', 'no_cookie'}"""
+        mask = self.classify(url)
+        return {category.name.lower() for category in DomainCategory if category and category in mask}
+
+
+# Global instance compiled at import time
+domain_classifier = DomainClassifier.from_config()
+
+
+def classify_url(url: str) -> DomainCategory:
+    """
+    Convenience function to get DomainsConfig categories of URL
+    """
+    return domain_classifier.classify(url)
@@ -16,6 +16,16 @@ class DomainsConfig(object):
     # Script for updating porn lists
     UPDATE_PORN_SCRIPT_PATH = "./script.sh"
     
+    # Bloom filter in front of porn domains check (saved next to PORN_DOMAINS_FILE as .bloom)
+    PORN_BLOOM_ENABLED = True
+    PORN_BLOOM_FP_RATE = 0.01  # 1% false positives
+    
+    # Optional JSON/TOML file overriding domain lists below (WHITELIST, GREYLIST, NO_COOKIE_DOMAINS...)
+    # e.g. {"WHITELIST": ["youtube.com"], "NO_COOKIE_DOMAINS": ["dailymotion.com"]}
+    # Changes are picked up without restart, lists missing in the file keep values from this class
+    DOMAINS_DATA_FILE = None  # e.g. "CONFIG/domains.json" or "CONFIG/domains.toml"
+    DOMAINS_RELOAD_INTERVAL = 30  # seconds between file checks
+    
     # --- Whitelist of keywords that are not considered porn ---
     WHITE_KEYWORDS = [
         'assasinate', 'assasinated', 'assassinate', 'assassinated', 'assassination'
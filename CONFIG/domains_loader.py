@@ -0,0 +1,219 @@
+# Domains Loader
+# DomainsConfig domain lists (WHITELIST, GREYLIST, NO_COOKIE_DOMAINS, NO_FILTER_DOMAINS...) overridden
+# from DOMAINS_DATA_FILE (JSON or TOML) and hot-reloaded without restart.
+# A reload reads and validates the file, compiles new matchers off the request path and only then
+# swaps lists and matchers in; invalid files are rejected and the running lists stay untouched.
+#
+# Validate file without applying it:
+#   python -m CONFIG.domains_loader --check CONFIG/domains.json
+
+import os
+import re
+import json
+import threading
+import types
+from typing import Dict, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from CONFIG.domains import DomainsConfig
+from CONFIG.domain_classifier import CONFIG_LISTS, DomainClassifier, domain_classifier
+from CONFIG.engine_router import EngineRouter, engine_router
+
+# Lists that may be overridden by data file
+RELOADABLE_LISTS = tuple(CONFIG_LISTS) + ('GALLERYDL_ONLY_PATH',)
+
+# Domain entry ("vk.com") or dotless label entry ("pornhub" in BLACK_LIST)
+_DOMAIN_RE = re.compile(r'^[a-z0-9_-]+(\.[a-z0-9_-]+)*\.?$')
+# Host + path prefix entry of GALLERYDL_ONLY_PATH ("vk.com/wall-")
+_PATH_RULE_RE = re.compile(r'^[a-z0-9_-]+(\.[a-z0-9_-]+)+/\S*$')
+
+# Values of DomainsConfig class, lists missing in data file fall back to them
+_DEFAULTS = {name: list(getattr(DomainsConfig, name, None) or []) for name in RELOADABLE_LISTS}
+
+
+def read_domains_file(path: str) -> dict:
+    """Read JSON or TOML data file (by extension)"""
+    if path.lower().endswith('.toml'):
+        if tomllib is None:
+            raise ValueError("TOML domains file requires Python 3.11+ or tomli package")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def validate_domains_data(data) -> Dict[str, List[str]]:
+    """
+    Validate data file contents
+    Returns normalized lists, raises ValueError listing every problem found
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Domains file must contain a table/object of lists")
+    errors = []
+    lists = {}
+    for name, values in data.items():
+        if name not in RELOADABLE_LISTS:
+            errors.append(f"{name}: unknown list (known: {', '.join(RELOADABLE_LISTS)})")
+            continue
+        if not isinstance(values, list):
+            errors.append(f"{name}: must be a list of strings")
+            continue
+        pattern = _PATH_RULE_RE if name == 'GALLERYDL_ONLY_PATH' else _DOMAIN_RE
+        entries = []
+        for value in values:
+            if not isinstance(value, str):
+                errors.append(f"{name}: {value!r} is not a string")
+                continue
+            entry = value.strip().lower()
+            if not pattern.match(entry):
+                errors.append(f"{name}: invalid entry {value!r}")
+                continue
+            if entry not in entries:
+                entries.append(entry)
+        lists[name] = entries
+    if errors:
+        raise ValueError("Invalid domains file:\n" + "\n".join(errors))
+    return lists
+
+
+class DomainsLoader(object):
+    """Atomic reloads of DomainsConfig lists from data file"""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.version = 0
+        self.last_error = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+
+    def get_path(self) -> Optional[str]:
+        return self.path or getattr(DomainsConfig, 'DOMAINS_DATA_FILE', None)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Reload lists if data file changed (or force)
+        Returns True if new lists were applied, raises ValueError/OSError if file is invalid
+        """
+        path = self.get_path()
+        if not path:
+            return False
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                if self._mtime is None:
+                    return False
+                # File was removed: fall back to DomainsConfig class values
+                lists = {}
+                mtime = None
+            else:
+                if not force and mtime == self._mtime:
+                    return False
+                try:
+                    lists = validate_domains_data(read_domains_file(path))
+                except (OSError, ValueError) as e:
+                    self.last_error = str(e)
+                    # Remember mtime so the same broken file is not reported on every check
+                    self._mtime = mtime
+                    raise
+            self._apply(lists)
+            self._mtime = mtime
+            self.last_error = None
+            return True
+
+    def _apply(self, lists: Dict[str, List[str]]):
+        """Compile matchers for new lists, then swap lists and matchers in"""
+        config = types.SimpleNamespace(**{name: lists.get(name, _DEFAULTS[name]) for name in RELOADABLE_LISTS})
+        # Compiled outside of request path, readers keep using old tables until swap
+        new_domain_classifier = DomainClassifier.from_config(config)
+        new_engine_router = EngineRouter.from_config(config)
+
+        for name in RELOADABLE_LISTS:
+            setattr(DomainsConfig, name, getattr(config, name))
+        domain_classifier.swap(new_domain_classifier)
+        engine_router.swap(new_engine_router)
+        from CONFIG.url_classifier import url_classifier
+        url_classifier.swap_domain_lists(domain_classifier, engine_router)
+        self.version += 1
+        overridden = ', '.join(sorted(lists)) or 'none'
+        print(f"Domain lists reloaded (version {self.version}, overridden: {overridden})")
+
+    def check(self) -> bool:
+        """Reload if changed, errors are logged and old lists are kept"""
+        try:
+            return self.reload()
+        except (OSError, ValueError) as e:
+            print(f"Error reloading domains file {self.get_path()}: {e}")
+            return False
+
+    def start_watcher(self, interval: float = None) -> bool:
+        """
+        Start background thread that hot-reloads data file every interval seconds
+        Returns False if there is no data file or watcher is already running
+        """
+        if not self.get_path():
+            return False
+        if self._watcher is not None and self._watcher.is_alive():
+            return False
+        if interval is None:
+            interval = getattr(DomainsConfig, 'DOMAINS_RELOAD_INTERVAL', 30)
+
+        self._watcher_stop.clear()
+
+        def watch():
+            while not self._watcher_stop.wait(interval):
+                self.check()
+
+        self._watcher = threading.Thread(target=watch, name='domains-watcher', daemon=True)
+        self._watcher.start()
+        return True
+
+    def stop_watcher(self):
+        """Stop background watcher"""
+        self._watcher_stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+# Global instance
+domains_loader = DomainsLoader()
+
+
+def load_domains_data() -> bool:
+    """
+    Apply DOMAINS_DATA_FILE at startup and start watcher, returns True if file was applied
+    """
+    applied = domains_loader.check()
+    domains_loader.start_watcher()
+    return applied
+
+
+def reload_domains(force: bool = True) -> bool:
+    """
+    Admin reload hook, raises ValueError with validation errors if file is invalid
+    """
+    return domains_loader.reload(force=force)
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) == 3 and sys.argv[1] == '--check':
+        try:
+            checked = validate_domains_data(read_domains_file(sys.argv[2]))
+        except (OSError, ValueError) as e:
+            print(e)
+            sys.exit(1)
+        for name, entries in checked.items():
+            print(f"{name}: {len(entries)} entries")
+    else:
+        print("Usage: python -m CONFIG.domains_loader --check <file>")
@@ -0,0 +1,151 @@
+# Engine Router
+# GALLERYDL_ONLY_DOMAINS, GALLERYDL_ONLY_PATH, GALLERYDL_FALLBACK_DOMAINS and TIKTOK_DOMAINS compiled
+# into one decision structure: reversed-label host trie with per-host path prefix tries.
+# Picks the download engine in O(len(url)) without spawning a yt-dlp probe
+
+import enum
+from urllib.parse import urlsplit
+
+from CONFIG.domains import DomainsConfig
+from CONFIG.domain_classifier import normalize_host
+
+
+class Engine(enum.Enum):
+    """Download engine for URL"""
+    YTDLP = 'yt-dlp'
+    GALLERYDL = 'gallery-dl'
+    YTDLP_GALLERYDL_FALLBACK = 'yt-dlp+gallery-dl'
+
+
+class Route(object):
+    """Engine decision for URL"""
+
+    __slots__ = ('engine', 'tiktok', 'matched')
+
+    def __init__(self, engine: Engine, tiktok: bool = False, matched: str = None):
+        self.engine = engine
+        self.tiktok = tiktok
+        self.matched = matched
+
+    def __repr__(self) -> str:
+        return f"<Route {self.engine.value} tiktok={self.tiktok} matched={self.matched}>"
+
+
+# Rule priority, higher wins: host+path rules are more specific than domain rules
+_PRIORITY = {
+    Engine.YTDLP_GALLERYDL_FALLBACK: 1,
+    Engine.GALLERYDL: 2,
+}
+
+
+class EngineRouter(object):
+    """Compiled routing table: host suffix -> engine, host suffix + path prefix -> engine"""
+
+    def __init__(self):
+        # Host trie node: [engine or None, matched rule, tiktok flag, {label: child}, path trie or None]
+        # Path trie node: [engine or None, matched rule, {char: child}]
+        self._root = self._new_host_node()
+
+    @staticmethod
+    def _new_host_node():
+        return [None, None, False, {}, None]
+
+    @classmethod
+    def from_config(cls, config=DomainsConfig) -> 'EngineRouter':
+        """Compile routing lists of config"""
+        router = cls()
+        for domain in getattr(config, 'TIKTOK_DOMAINS', []):
+            router._host_node(domain)[2] = True
+        for domain in getattr(config, 'GALLERYDL_FALLBACK_DOMAINS', []):
+            router.add_domain(domain, Engine.YTDLP_GALLERYDL_FALLBACK)
+        for domain in getattr(config, 'GALLERYDL_ONLY_DOMAINS', []):
+            router.add_domain(domain, Engine.GALLERYDL)
+        for rule in getattr(config, 'GALLERYDL_ONLY_PATH', []):
+            router.add_path(rule, Engine.GALLERYDL)
+        return router
+
+    def _host_node(self, domain: str):
+        """Get (creating) trie node of domain"""
+        node = self._root
+        for label in reversed(normalize_host(domain).split('.')):
+            children = node[3]
+            child = children.get(label)
+            if child is None:
+                child = children[label] = self._new_host_node()
+            node = child
+        return node
+
+    def add_domain(self, domain: str, engine: Engine):
+        """Route domain and its subdomains to engine"""
+        node = self._host_node(domain)
+        if node[0] is None or _PRIORITY[engine] >= _PRIORITY[node[0]]:
+            node[0] = engine
+            node[1] = domain
+
+    def add_path(self, rule: str, engine: Engine):
+        """Route URLs whose host is (a subdomain of) rule host and whose path starts with rule path"""
+        domain, _, path_prefix = rule.partition('/')
+        node = self._host_node(domain)
+        if node[4] is None:
+            node[4] = [None, None, {}]
+        path_node = node[4]
+        for char in '/' + path_prefix:
+            path_node = path_node[2].setdefault(char, [None, None, {}])
+        path_node[0] = engine
+        path_node[1] = rule
+
+    def swap(self, other: 'EngineRouter'):
+        """Atomically replace routing table with table compiled into other router"""
+        self._root = other._root
+
+    def route(self, url: str) -> Route:
+        """Get engine for URL"""
+        url = url.strip()
+        if '//' not in url:
+            url = '//' + url
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return Route(Engine.YTDLP)
+        host = normalize_host(parts.netloc)
+
+        engine = None
+        matched = None
+        tiktok = False
+        path_tries = []
+        node = self._root
+        for label in reversed(host.split('.')):
+            node = node[3].get(label)
+            if node is None:
+                break
+            if node[0] is not None and (engine is None or _PRIORITY[node[0]] >= _PRIORITY[engine]):
+                engine, matched = node[0], node[1]
+            tiktok = tiktok or node[2]
+            if node[4] is not None:
+                path_tries.append(node[4])
+
+        # Most specific host with a matching path prefix wins
+        path = parts.path or '/'
+        for path_node in reversed(path_tries):
+            path_engine = None
+            for char in path:
+                path_node = path_node[2].get(char)
+                if path_node is None:
+                    break
+                if path_node[0] is not None:
+                    path_engine, path_matched = path_node[0], path_node[1]
+            if path_engine is not None:
+                return Route(path_engine, tiktok, path_matched)
+
+        return Route(engine or Engine.YTDLP, tiktok, matched)
+
+
+# Global instance compiled at import time
+engine_router = EngineRouter.from_config()
+
+
+def route_url(url: str) -> Route:
+    """
+    Convenience function to get download engine for URL
+    """
+    return engine_router.route(url)
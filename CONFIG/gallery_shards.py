@@ -0,0 +1,201 @@
+# Gallery Shards
+# Sharded /img downloads: a large start-end range is split into sub-ranges downloaded by parallel
+# gallery-dl runs. gallery-dl configuration (cookies, proxy, image-range) is process-global,
+# so every shard runs in its own worker process with its own cookie file and proxy.
+# Workers are spawned, not forked: a fork of the multi-threaded bot would inherit locks held
+# by other threads (language router, SQLite preferences) and could deadlock. A spawned worker
+# starts with empty gallery-dl config, so a snapshot of the bot's config is installed by the
+# pool initializer and restored before every shard.
+# Results are merged in range order, and a per-domain cap on running shards (shared by all
+# downloads) keeps sites under their rate limits
+
+import os
+import copy
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from CONFIG.limits import LimitsConfig
+from CONFIG.domain_classifier import get_url_host
+
+
+def split_range(start: int, end: int, shards: int = None, min_shard_size: int = None) -> List[Tuple[int, int]]:
+    """
+    Split inclusive 1-based range into at most shards contiguous sub-ranges of near-equal size
+    (no sub-range is smaller than min_shard_size unless the whole range is)
+    """
+    if shards is None:
+        shards = LimitsConfig.IMG_SHARDS
+    if min_shard_size is None:
+        min_shard_size = LimitsConfig.IMG_MIN_SHARD_SIZE
+    if end < start:
+        return []
+    total = end - start + 1
+    shards = max(1, min(shards, total // max(min_shard_size, 1)))
+    size, extra = divmod(total, shards)
+    ranges = []
+    shard_start = start
+    for index in range(shards):
+        shard_end = shard_start + size - 1 + (1 if index < extra else 0)
+        ranges.append((shard_start, shard_end))
+        shard_start = shard_end + 1
+    return ranges
+
+
+def get_domain_limit(url: str) -> Tuple[str, int]:
+    """Get (domain key, max parallel shards) for URL from IMG_DOMAIN_CONCURRENCY settings"""
+    host = get_url_host(url)
+    overrides = getattr(LimitsConfig, 'IMG_DOMAIN_CONCURRENCY_OVERRIDES', {})
+    labels = host.split('.')
+    for index in range(len(labels)):
+        suffix = '.'.join(labels[index:])
+        if suffix in overrides:
+            return suffix, overrides[suffix]
+    return host, LimitsConfig.IMG_DOMAIN_CONCURRENCY
+
+
+class DomainLimiter(object):
+    """Per-domain semaphores shared by all sharded downloads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def get(self, domain: str, limit: int) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(domain)
+            if semaphore is None:
+                semaphore = self._semaphores[domain] = threading.BoundedSemaphore(max(limit, 1))
+            return semaphore
+
+
+domain_limiter = DomainLimiter()
+
+
+def _list_files(directory: str) -> List[str]:
+    """Files of directory in download order"""
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+    return [path for _, path in sorted(files)]
+
+
+# gallery-dl config of the bot process, installed in every worker by _init_worker
+_base_config = {}
+
+
+def get_gallery_dl_config() -> dict:
+    """Get snapshot of current process gallery-dl config (empty if gallery-dl is not installed)"""
+    try:
+        from gallery_dl import config
+    except ImportError:
+        return {}
+    return copy.deepcopy(getattr(config, '_config', {}))
+
+
+def _init_worker(base_config: dict):
+    """Pool initializer: keep bot's gallery-dl config for shards of this worker"""
+    global _base_config
+    _base_config = base_config
+
+
+def run_shard(shard: dict) -> dict:
+    """
+    Download one sub-range with gallery-dl in current (worker) process
+    shard: index, url, start, end, directory, cookies, proxy
+    Log messages are returned as (message key, params) in result['messages'] and printed by
+    the parent, so the worker does not load the language router
+    """
+    result = {'index': shard['index'], 'start': shard['start'], 'end': shard['end'],
+              'status': None, 'error': None, 'files': [], 'messages': []}
+    try:
+        from gallery_dl import config, job
+        # Start from bot's gallery-dl config (a pooled worker may have run another shard before),
+        # only shard keys are overridden
+        config.clear()
+        config._config.update(copy.deepcopy(_base_config))
+        config.set(('extractor',), 'base-directory', shard['directory'])
+        config.set(('extractor',), 'image-range', f"{shard['start']}-{shard['end']}")
+        if shard.get('cookies'):
+            result['messages'].append(('GALLERY_DL_SETTING_COOKIES_ON_EXTRACTOR_MSG', {'cookie_path': shard['cookies']}))
+            config.set(('extractor',), 'cookies', shard['cookies'])
+        if shard.get('proxy'):
+            config.set(('extractor',), 'proxy', shard['proxy'])
+        result['status'] = job.DownloadJob(shard['url']).run()
+    except Exception as e:
+        result['error'] = str(e)
+    result['files'] = _list_files(shard['directory'])
+    return result
+
+
+def run_sharded(url: str, start: int, end: int, directory: str,
+                cookies: Sequence[Optional[str]] = (None,), proxies: Sequence[Optional[str]] = (None,),
+                shards: int = None, runner: Callable[[dict], dict] = run_shard,
+                on_shard_done: Callable[[dict], None] = None,
+                gallery_dl_config: dict = None) -> List[dict]:
+    """
+    Download range start-end of gallery URL in parallel shards
+    Shard i uses cookies[i % len(cookies)] and proxies[i % len(proxies)], files go to directory/shard_NN.
+    Shards run with gallery_dl_config (default: snapshot of this process gallery-dl config),
+    cookies and proxy of a shard override its values.
+    runner must be a module-level function (workers are spawned and import it by name).
+    Returns shard results in range order (merged file list: sum of result['files'])
+    """
+    ranges = split_range(start, end, shards)
+    if not ranges:
+        return []
+    cookies = list(cookies) or [None]
+    proxies = list(proxies) or [None]
+    specs = [{
+        'index': index, 'url': url, 'start': shard_start, 'end': shard_end,
+        'directory': os.path.join(directory, f"shard_{index:02d}"),
+        'cookies': cookies[index % len(cookies)],
+        'proxy': proxies[index % len(proxies)],
+    } for index, (shard_start, shard_end) in enumerate(ranges)]
+
+    if gallery_dl_config is None:
+        gallery_dl_config = get_gallery_dl_config()
+    domain, limit = get_domain_limit(url)
+    semaphore = domain_limiter.get(domain, limit)
+    results = {}
+
+    def done(future, spec):
+        semaphore.release()
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'index': spec['index'], 'start': spec['start'], 'end': spec['end'],
+                      'status': None, 'error': str(e), 'files': [], 'messages': []}
+        if result.get('messages'):
+            from CONFIG.LANGUAGES.language_router import format_message
+            for message_key, params in result['messages']:
+                print(format_message(message_key, **params))
+        results[spec['index']] = result
+        if on_shard_done is not None:
+            on_shard_done(result)
+
+    with ProcessPoolExecutor(max_workers=min(len(specs), max(limit, 1)),
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(gallery_dl_config,)) as pool:
+        for spec in specs:
+            os.makedirs(spec['directory'], exist_ok=True)
+            # Waits while this site already has its limit of running shards (from any download)
+            semaphore.acquire()
+            try:
+                future = pool.submit(runner, spec)
+            except Exception:
+                semaphore.release()
+                raise
+            future.add_done_callback(lambda future, spec=spec: done(future, spec))
+    return [results[index] for index in sorted(results)]
+
+
+def merge_shard_files(results: List[dict]) -> List[str]:
+    """Get files of all shards in range order"""
+    return [path for result in sorted(results, key=lambda result: result['index']) for path in result['files']]
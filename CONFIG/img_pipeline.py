@@ -0,0 +1,243 @@
+# Img Pipeline
+# Streaming /img flow: gallery-dl files -> bounded queue -> album batcher -> uploader.
+# Media groups of 10 are sent as soon as they fill (partial groups after a short idle time),
+# sent files are deleted, and when too many files wait on disk the producer (gallery-dl process)
+# is paused until the uploader catches up, so disk usage stays bounded for any range size
+
+import os
+import queue
+import signal
+import subprocess
+import threading
+from typing import Callable, Iterable, List, Optional
+
+# Telegram media group limit
+ALBUM_SIZE = 10
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.heic', '.avif')
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mkv', '.mov', '.m4v', '.avi', '.gif')
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.ogg', '.opus', '.flac', '.wav')
+
+# Album kinds: photos and videos may share a media group, audio and documents may not mix with them
+KIND_VISUAL = 'visual'
+KIND_AUDIO = 'audio'
+KIND_DOCUMENT = 'document'
+
+_END = object()
+
+
+def get_album_kind(path: str) -> str:
+    """Get media group kind of file"""
+    name = path.lower()
+    if name.endswith(PHOTO_EXTENSIONS) or name.endswith(VIDEO_EXTENSIONS):
+        return KIND_VISUAL
+    if name.endswith(AUDIO_EXTENSIONS):
+        return KIND_AUDIO
+    return KIND_DOCUMENT
+
+
+class AlbumBatcher(object):
+    """Group files into media groups of up to album_size files of one kind, in arrival order"""
+
+    def __init__(self, album_size: int = ALBUM_SIZE):
+        self.album_size = album_size
+        self._batches = {}
+
+    def add(self, path: str) -> Optional[List[str]]:
+        """Add file, returns full album or None"""
+        kind = get_album_kind(path)
+        batch = self._batches.setdefault(kind, [])
+        batch.append(path)
+        if len(batch) >= self.album_size:
+            del self._batches[kind]
+            return batch
+        return None
+
+    def flush(self) -> List[List[str]]:
+        """Get all partial albums"""
+        batches = list(self._batches.values())
+        self._batches = {}
+        return batches
+
+    def __len__(self) -> int:
+        return sum(len(batch) for batch in self._batches.values())
+
+
+def process_pauser(process) -> tuple:
+    """
+    Get (pause, resume) callbacks that stop/continue a subprocess (e.g. gallery-dl Popen)
+    No-op on platforms without SIGSTOP
+    """
+    if not hasattr(signal, 'SIGSTOP'):
+        return (lambda: None), (lambda: None)
+
+    def send(sig):
+        if process.poll() is None:
+            try:
+                os.kill(process.pid, sig)
+            except OSError:
+                pass
+
+    return (lambda: send(signal.SIGSTOP)), (lambda: send(signal.SIGCONT))
+
+
+class ImgPipeline(object):
+    """
+    Bounded producer/consumer between gallery-dl output and album uploads
+    files: iterable of completed file paths (e.g. ImgWatcher.files())
+    send_album: uploads one media group, called from consumer thread
+    max_pending: files on disk not yet sent before producer is paused (resumed at half of it)
+    """
+
+    def __init__(self, files: Iterable[str], send_album: Callable[[List[str]], None],
+                 album_size: int = ALBUM_SIZE, max_pending: int = ALBUM_SIZE * 3,
+                 flush_timeout: float = 5.0, delete_sent: bool = True,
+                 pause: Callable[[], None] = None, resume: Callable[[], None] = None):
+        self.files = files
+        self.send_album = send_album
+        self.batcher = AlbumBatcher(album_size)
+        self.max_pending = max(max_pending, album_size)
+        self.resume_pending = self.max_pending // 2
+        self.flush_timeout = flush_timeout
+        self.delete_sent = delete_sent
+        self._pause = pause
+        self._resume = resume
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._paused = False
+        self._error = None
+        self.files_sent = 0
+        self.albums_sent = 0
+        self.pauses = 0
+        self.max_pending_seen = 0
+
+    def _produce(self):
+        try:
+            for path in self.files:
+                with self._lock:
+                    self._pending += 1
+                    self.max_pending_seen = max(self.max_pending_seen, self._pending)
+                    pause = not self._paused and self._pending >= self.max_pending
+                    if pause:
+                        self._paused = True
+                        self.pauses += 1
+                if pause and self._pause is not None:
+                    self._pause()
+                # Blocks while consumer is behind
+                self._queue.put(path)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._queue.put(_END)
+
+    def _send(self, album: List[str]):
+        self.send_album(album)
+        if self.delete_sent:
+            for path in album:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._lock:
+            self._pending -= len(album)
+            self.files_sent += len(album)
+            self.albums_sent += 1
+            resume = self._paused and self._pending <= self.resume_pending
+            if resume:
+                self._paused = False
+        if resume and self._resume is not None:
+            self._resume()
+
+    def run(self) -> int:
+        """Run pipeline until producer is exhausted, returns number of files sent"""
+        producer = threading.Thread(target=self._produce, name='img-pipeline-producer', daemon=True)
+        producer.start()
+        try:
+            while True:
+                try:
+                    path = self._queue.get(timeout=self.flush_timeout)
+                except queue.Empty:
+                    # Producer is slow: send what we have so user sees progress
+                    for album in self.batcher.flush():
+                        self._send(album)
+                    continue
+                if path is _END:
+                    break
+                album = self.batcher.add(path)
+                if album is not None:
+                    self._send(album)
+            for album in self.batcher.flush():
+                self._send(album)
+        finally:
+            # Never leave producer process stopped
+            with self._lock:
+                resume = self._paused
+                self._paused = False
+            if resume and self._resume is not None:
+                self._resume()
+        producer.join(timeout=5)
+        if self._error is not None:
+            raise self._error
+        return self.files_sent
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'files_sent': self.files_sent,
+                'albums_sent': self.albums_sent,
+                'pending': self._pending,
+                'max_pending': self.max_pending_seen,
+                'pauses': self.pauses,
+            }
+
+
+def stop_process(process, grace: float = 10.0):
+    """Terminate process if it is still running, kill it if it ignores SIGTERM for grace seconds"""
+    if process.poll() is not None:
+        return
+    if hasattr(signal, 'SIGCONT'):
+        # Stopped process would not handle SIGTERM
+        try:
+            os.kill(process.pid, signal.SIGCONT)
+        except OSError:
+            pass
+    process.terminate()
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def stream_gallery(process, watcher, send_album: Callable[[List[str]], None],
+                   grace: float = 10.0, **kwargs) -> int:
+    """
+    Stream files of running gallery-dl process to send_album
+    watcher is ImgWatcher over process download directory, it is finished when process exits.
+    Watcher timeouts are suspended while the process is paused for backpressure.
+    If streaming ends first (MAX_IMG_FILES, timeouts, upload error) the process is terminated,
+    so it does not keep filling the disk with files nobody sends
+    """
+    pause_process, resume_process = process_pauser(process)
+
+    # While producer is paused its silence is not inactivity
+    def pause():
+        watcher.suspend()
+        pause_process()
+
+    def resume():
+        resume_process()
+        watcher.resume()
+
+    def wait_process():
+        process.wait()
+        watcher.finish()
+
+    threading.Thread(target=wait_process, name='img-pipeline-process', daemon=True).start()
+    pipeline = ImgPipeline(watcher.files(), send_album, pause=pause, resume=resume, **kwargs)
+    try:
+        return pipeline.run()
+    finally:
+        watcher.stop()
+        stop_process(process, grace)
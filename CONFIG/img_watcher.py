@@ -0,0 +1,325 @@
+# Img Watcher
+# Streams files gallery-dl finishes in the /img download directory as soon as they are complete,
+# instead of waiting for range boundaries. Uses Linux inotify (IN_CLOSE_WRITE / IN_MOVED_TO,
+# via libc, no extra dependency) and falls back to polling with adaptive backoff elsewhere.
+# MAX_IMG_INACTIVITY_TIME is measured from the last real file event (writes to files still being
+# downloaded count, so one long video does not look idle), MAX_IMG_TOTAL_WAIT_TIME
+# bounds the whole watch and MAX_IMG_FILES the number of streamed files.
+# Both clocks stand still while the consumer holds a yielded file or has suspended the watcher
+# (uploader behind, producer paused), so slow uploads never look like an idle download
+
+import os
+import time
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+from typing import Callable, Iterator, Set
+
+from CONFIG.limits import LimitsConfig
+
+# Files still being written by gallery-dl/yt-dlp
+PARTIAL_SUFFIXES = ('.part', '.ytdl', '.tmp', '.temp')
+MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.heic', '.avif',
+                    '.mp4', '.webm', '.mkv', '.mov', '.m4v', '.avi', '.mp3', '.m4a')
+
+# Stop reasons
+STOP_FINISHED = 'finished'          # producer finished and all files were streamed
+STOP_INACTIVITY = 'inactivity'      # no file events for MAX_IMG_INACTIVITY_TIME
+STOP_TOTAL_TIMEOUT = 'total_timeout'
+STOP_MAX_FILES = 'max_files'
+STOP_STOPPED = 'stopped'            # stop() was called
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_complete_media(path: str, extensions=MEDIA_EXTENSIONS) -> bool:
+    """Check that file name is media and not a partial download"""
+    name = os.path.basename(path).lower()
+    if name.startswith('.') or name.endswith(PARTIAL_SUFFIXES):
+        return False
+    return extensions is None or name.endswith(extensions)
+
+
+class _InotifyBackend(object):
+    """Recursive inotify watch, reports paths of closed-after-write and moved-in files"""
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directory: str):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name or not hasattr(os, 'O_NONBLOCK'):
+            raise OSError("inotify is not available")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self.rescan_needed = False
+        self.add_tree(directory)
+
+    def add_tree(self, directory: str):
+        """Watch directory and its subdirectories (gallery-dl creates nested folders)"""
+        for root, _, _ in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), self.MASK)
+            if wd >= 0:
+                self._dirs[wd] = root
+
+    def wait(self, timeout: float) -> tuple:
+        """
+        Wait up to timeout seconds
+        Returns (paths of completed files, True if there was any file activity)
+        """
+        # Short waits so finish() and stop() are noticed quickly
+        ready, _, _ = select.select([self._fd], [], [], max(min(timeout, 1.0), 0))
+        if not ready:
+            return [], False
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return [], False
+        paths = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.rescan_needed = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                    # Files could be written before the new directory was watched
+                    self.rescan_needed = True
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                paths.append(path)
+        # Any event (including IN_MODIFY of a file still being written) is activity
+        return paths, bool(data)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend(object):
+    """Directory polling with adaptive backoff, a file is complete once its size stopped changing"""
+
+    def __init__(self, directory: str, wake: threading.Event = None,
+                 min_interval: float = 0.5, max_interval: float = 10.0):
+        self.directory = directory
+        self.wake = wake or threading.Event()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.rescan_needed = False
+        self._sizes = {}
+
+    def _scan(self) -> dict:
+        sizes = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    sizes[path] = os.path.getsize(path)
+                except OSError:
+                    pass
+        return sizes
+
+    def wait(self, timeout: float) -> tuple:
+        """
+        Sleep up to timeout seconds and rescan
+        Returns (paths of completed files, True if files appeared or grew)
+        """
+        self.wake.wait(max(min(self.interval, timeout), 0))
+        sizes = self._scan()
+        paths = [path for path, size in sizes.items() if self._sizes.get(path) == size]
+        changed = sizes != self._sizes
+        self._sizes = sizes
+        # Poll fast while files appear or grow, back off while directory is idle
+        self.interval = self.min_interval if changed else min(self.interval * 2, self.max_interval)
+        return paths, changed
+
+    def close(self):
+        pass
+
+
+class ImgWatcher(object):
+    """
+    Stream completed media files of a download directory
+    Producer (gallery-dl runner) calls finish() when it exits, remaining files are then drained
+    """
+
+    def __init__(self, directory: str, extensions=MEDIA_EXTENSIONS,
+                 inactivity_timeout: float = None, total_timeout: float = None, max_files: int = None,
+                 use_inotify: bool = True, clock: Callable[[], float] = time.monotonic):
+        self.directory = directory
+        self.extensions = extensions
+        self.inactivity_timeout = inactivity_timeout or LimitsConfig.MAX_IMG_INACTIVITY_TIME
+        self.total_timeout = total_timeout or LimitsConfig.MAX_IMG_TOTAL_WAIT_TIME
+        self.max_files = max_files or LimitsConfig.MAX_IMG_FILES
+        self.use_inotify = use_inotify
+        self._clock = clock
+        # Paths already yielded
+        self._seen: Set[str] = set()
+        self._finished = threading.Event()
+        self._stopped = threading.Event()
+        # Set by finish() and stop() to interrupt polling sleep
+        self._wake = threading.Event()
+        # Suspended time is excluded from inactivity and total timeouts
+        self._suspend_lock = threading.Lock()
+        self._suspend_depth = 0
+        self._suspended_since = None
+        self._suspended_total = 0.0
+        self.stop_reason = None
+        self.backend_name = None
+        self.last_event_at = None
+
+    def finish(self):
+        """Producer is done, stop after remaining files are streamed"""
+        self._finished.set()
+        self._wake.set()
+
+    def stop(self):
+        """Stop streaming now"""
+        self._stopped.set()
+        self._wake.set()
+
+    def suspend(self):
+        """Stop timeout clocks (consumer is not taking files, e.g. producer is paused)"""
+        with self._suspend_lock:
+            if self._suspend_depth == 0:
+                self._suspended_since = self._clock()
+            self._suspend_depth += 1
+
+    def resume(self):
+        """Restart timeout clocks stopped by suspend()"""
+        with self._suspend_lock:
+            if self._suspend_depth == 0:
+                return
+            self._suspend_depth -= 1
+            if self._suspend_depth == 0:
+                self._suspended_total += self._clock() - self._suspended_since
+                self._suspended_since = None
+
+    def _now(self) -> float:
+        """Clock time without suspended time (frozen while suspended)"""
+        with self._suspend_lock:
+            if self._suspended_since is not None:
+                return self._suspended_since - self._suspended_total
+            return self._clock() - self._suspended_total
+
+    def _open_backend(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.use_inotify:
+            try:
+                backend = _InotifyBackend(self.directory)
+                self.backend_name = 'inotify'
+                return backend
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable for {self.directory}, polling instead: {e}")
+        self.backend_name = 'polling'
+        return _PollingBackend(self.directory, self._wake)
+
+    def _new_files(self, paths) -> list:
+        """Completed media files not yielded yet (paths are marked seen only when yielded)"""
+        new = []
+        for path in sorted(set(paths)):
+            if path not in self._seen and is_complete_media(path, self.extensions) and os.path.isfile(path):
+                new.append(path)
+        return new
+
+    def _existing_files(self) -> list:
+        paths = []
+        for root, _, files in os.walk(self.directory):
+            paths.extend(os.path.join(root, name) for name in files)
+        return paths
+
+    def files(self) -> Iterator[str]:
+        """Yield paths of completed files in order of completion until a stop condition is met"""
+        backend = self._open_backend()
+        start = self._now()
+        self.last_event_at = start
+        try:
+            pending = self._new_files(self._existing_files()) if self.backend_name == 'inotify' else []
+            while True:
+                for path in pending:
+                    if path in self._seen:
+                        continue
+                    self._seen.add(path)
+                    # Consumer may block on this file (upload queue full), that is not inactivity
+                    self.suspend()
+                    try:
+                        yield path
+                    finally:
+                        self.resume()
+                    if len(self._seen) >= self.max_files:
+                        self.stop_reason = STOP_MAX_FILES
+                        return
+                if pending:
+                    self.last_event_at = self._now()
+
+                if self._stopped.is_set():
+                    self.stop_reason = STOP_STOPPED
+                    return
+                finished = self._finished.is_set()
+                if finished:
+                    # Producer exited: drain remaining files, timeouts no longer apply.
+                    # Only collect events that are already queued
+                    timeout = 0
+                else:
+                    now = self._now()
+                    if now - start >= self.total_timeout:
+                        self.stop_reason = STOP_TOTAL_TIMEOUT
+                        return
+                    if now - self.last_event_at >= self.inactivity_timeout:
+                        self.stop_reason = STOP_INACTIVITY
+                        return
+                    timeout = min(self.total_timeout - (now - start), self.inactivity_timeout - (now - self.last_event_at))
+                    if self._suspend_depth:
+                        # Clocks are frozen, do not spin on the frozen remainder
+                        timeout = max(timeout, 1.0)
+                paths, active = backend.wait(timeout)
+                if active:
+                    self.last_event_at = self._now()
+                if backend.rescan_needed:
+                    backend.rescan_needed = False
+                    paths = list(paths) + self._existing_files()
+                pending = self._new_files(paths)
+
+                if finished and not pending:
+                    # Last pass over directory catches files of events that raced with finish()
+                    pending = self._new_files(self._existing_files())
+                    if not pending:
+                        self.stop_reason = STOP_FINISHED
+                        return
+        finally:
+            backend.close()
+
+    def stream(self, on_file: Callable[[str], None]) -> str:
+        """Call on_file for every completed file, returns stop reason"""
+        for path in self.files():
+            on_file(path)
+        return self.stop_reason
+
+    @property
+    def count(self) -> int:
+        return len(self._seen)
@@ -0,0 +1,298 @@
+# Job Scheduler
+# Admission control for downloads: jobs over LimitsConfig limits are rejected before anything is
+# downloaded, accepted jobs get per-user, per-group and global slots. Waiting jobs are ordered by
+# weighted fair queuing over estimated bytes (self-clocked finish tags), so one user with a huge
+# playlist can not hold back small downloads of everyone else, and every waiting user is told
+# their queue position instead of AUDIO_WAIT_MSG
+
+import bisect
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from CONFIG.limits import LimitsConfig
+
+GIB = 1024 ** 3
+
+# Cost of job whose size is unknown
+DEFAULT_JOB_BYTES = 100 * 1024 ** 2
+# Smallest cost, so tiny jobs still advance their user's finish tag
+MIN_JOB_BYTES = 1024 ** 2
+
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+STATE_CANCELLED = 'cancelled'
+
+
+class JobRejected(Exception):
+    """Job is over limits, message_key and params describe the reason for the user"""
+
+    def __init__(self, message_key: str, **params):
+        super().__init__(f"{message_key} {params}")
+        self.message_key = message_key
+        self.params = params
+
+    def format(self, user_id: int = None) -> str:
+        """Get rejection message in user's language"""
+        from CONFIG.LANGUAGES.language_router import format_message
+        return format_message(self.message_key, user_id=user_id, **self.params)
+
+
+class Job(object):
+    """Download job admitted by scheduler"""
+
+    def __init__(self, scheduler: 'JobScheduler', job_id: int, user_id: int, group_id: Optional[int],
+                 estimated_bytes: Optional[int], finish_tag: float, submitted_at: float,
+                 on_start: Callable[['Job'], None] = None):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.user_id = user_id
+        self.group_id = group_id
+        self.estimated_bytes = estimated_bytes
+        self.finish_tag = finish_tag
+        self.submitted_at = submitted_at
+        self.started_at = None
+        self.state = STATE_QUEUED
+        self.on_start = on_start
+        self._started = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until job gets its slot, returns False on timeout or if job was cancelled"""
+        self._started.wait(timeout)
+        return self.state == STATE_RUNNING
+
+    @property
+    def position(self) -> int:
+        """1-based position in queue, 0 if job is not waiting"""
+        return self.scheduler.position(self)
+
+    def finish(self):
+        self.scheduler.finish(self)
+
+    def __enter__(self) -> 'Job':
+        if not self.wait():
+            # Cancelled while waiting, the download must not run
+            raise JobRejected('QUEUE_CANCELLED_MSG')
+        return self
+
+    def __exit__(self, *args):
+        self.finish()
+
+    def __repr__(self) -> str:
+        return f"<Job {self.job_id} user={self.user_id} group={self.group_id} {self.state}>"
+
+
+class JobScheduler(object):
+    """Global download scheduler with per-user, per-group and global concurrency slots"""
+
+    def __init__(self, max_active: int = None, max_user_active: int = None,
+                 max_user_queued: int = None, max_queued: int = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_active = max_active or getattr(LimitsConfig, 'MAX_ACTIVE_DOWNLOADS', 8)
+        self.max_user_active = max_user_active or getattr(LimitsConfig, 'MAX_USER_ACTIVE_DOWNLOADS', 1)
+        self.max_user_queued = max_user_queued or getattr(LimitsConfig, 'MAX_USER_QUEUED_DOWNLOADS', 5)
+        self.max_queued = max_queued or getattr(LimitsConfig, 'MAX_QUEUED_DOWNLOADS', 200)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Waiting jobs sorted by (finish tag, job id)
+        self._queue = []
+        self._running = {}
+        # Slot owner ('user', id) / ('group', id) -> running or queued job count
+        self._active = {}
+        self._queued = {}
+        # Fair queuing state: virtual time and last finish tag of every user
+        self._virtual_time = 0.0
+        self._last_finish = {}
+        self.rejected = 0
+        self.expired = 0
+
+    @staticmethod
+    def _multiplier(group_id: Optional[int]) -> int:
+        return LimitsConfig.GROUP_MULTIPLIER if group_id else 1
+
+    @staticmethod
+    def _owners(user_id: int, group_id: Optional[int]) -> List[tuple]:
+        owners = [('user', user_id)]
+        if group_id:
+            owners.append(('group', group_id))
+        return owners
+
+    def check_limits(self, group_id: Optional[int] = None, estimated_bytes: int = None,
+                     duration: float = None, count: int = None, max_count: int = None):
+        """
+        Raise JobRejected if job is over LimitsConfig limits (multiplied by GROUP_MULTIPLIER in groups)
+        max_count defaults to MAX_PLAYLIST_COUNT (pass MAX_TIKTOK_COUNT or MAX_IMG_FILES for those jobs)
+        """
+        multiplier = self._multiplier(group_id)
+        max_size_gb = LimitsConfig.MAX_FILE_SIZE_GB * multiplier
+        if estimated_bytes and estimated_bytes > max_size_gb * GIB:
+            raise JobRejected('ERROR_FILE_SIZE_LIMIT_MSG', limit=max_size_gb)
+        max_duration = LimitsConfig.MAX_VIDEO_DURATION * multiplier
+        if duration and duration > max_duration:
+            raise JobRejected('QUEUE_DURATION_LIMIT_MSG', limit=max_duration)
+        if max_count is None:
+            max_count = LimitsConfig.MAX_PLAYLIST_COUNT
+        max_count *= multiplier
+        if count and count > max_count:
+            raise JobRejected('QUEUE_PLAYLIST_LIMIT_MSG', count=count, limit=max_count)
+
+    def submit(self, user_id: int, group_id: int = None, estimated_bytes: int = None,
+               duration: float = None, count: int = None, max_count: int = None,
+               on_start: Callable[[Job], None] = None) -> Job:
+        """
+        Admit download job, raises JobRejected if it is over limits or queue is full
+        Job starts at once if slots are free, otherwise it waits (see Job.wait and Job.position)
+        """
+        try:
+            self.check_limits(group_id, estimated_bytes, duration, count, max_count)
+        except JobRejected:
+            with self._lock:
+                self.rejected += 1
+            raise
+
+        cost = max(estimated_bytes or DEFAULT_JOB_BYTES, MIN_JOB_BYTES)
+        owners = self._owners(user_id, group_id)
+        with self._lock:
+            self._expire_running()
+            max_user_queued = self.max_user_queued * self._multiplier(group_id)
+            if len(self._queue) >= self.max_queued:
+                self.rejected += 1
+                raise JobRejected('QUEUE_FULL_MSG', limit=self.max_queued)
+            if self._queued.get(owners[-1], 0) >= max_user_queued:
+                self.rejected += 1
+                raise JobRejected('QUEUE_FULL_MSG', limit=max_user_queued)
+
+            # Finish tag: user's jobs are spaced by their size, idle users start at current virtual time
+            finish_tag = max(self._virtual_time, self._last_finish.get(user_id, 0.0)) + cost
+            self._last_finish[user_id] = finish_tag
+            job = Job(self, next(self._ids), user_id, group_id, estimated_bytes, finish_tag,
+                      self._clock(), on_start)
+            bisect.insort(self._queue, (finish_tag, job.job_id, job))
+            for owner in owners:
+                self._queued[owner] = self._queued.get(owner, 0) + 1
+            started = self._dispatch()
+        self._notify(started)
+        return job
+
+    def _has_slot(self, job: Job) -> bool:
+        if self._active.get(('user', job.user_id), 0) >= self.max_user_active:
+            return False
+        if job.group_id and self._active.get(('group', job.group_id), 0) >= \
+                self.max_user_active * LimitsConfig.GROUP_MULTIPLIER:
+            return False
+        return True
+
+    def _dispatch(self) -> List[Job]:
+        """Start waiting jobs in finish tag order while slots are free (lock must be held)"""
+        started = []
+        index = 0
+        while index < len(self._queue) and len(self._running) < self.max_active:
+            finish_tag, _, job = self._queue[index]
+            if not self._has_slot(job):
+                index += 1
+                continue
+            del self._queue[index]
+            for owner in self._owners(job.user_id, job.group_id):
+                self._queued[owner] -= 1
+                self._active[owner] = self._active.get(owner, 0) + 1
+            self._virtual_time = max(self._virtual_time, finish_tag)
+            job.state = STATE_RUNNING
+            job.started_at = self._clock()
+            self._running[job.job_id] = job
+            started.append(job)
+        return started
+
+    def _notify(self, started: List[Job]):
+        """Wake up started jobs (outside of lock, on_start callbacks may take time)"""
+        for job in started:
+            job._started.set()
+            if job.on_start is not None:
+                try:
+                    job.on_start(job)
+                except Exception as e:
+                    print(f"Error in job {job.job_id} start callback: {e}")
+
+    def _release(self, job: Job, state: str):
+        """Free job slots (lock must be held)"""
+        if job.state == STATE_RUNNING:
+            del self._running[job.job_id]
+            for owner in self._owners(job.user_id, job.group_id):
+                self._active[owner] -= 1
+        elif job.state == STATE_QUEUED:
+            self._queue.remove((job.finish_tag, job.job_id, job))
+            for owner in self._owners(job.user_id, job.group_id):
+                self._queued[owner] -= 1
+        else:
+            return
+        job.state = state
+        for owner in self._owners(job.user_id, job.group_id):
+            if not self._active.get(owner) and not self._queued.get(owner):
+                self._active.pop(owner, None)
+                self._queued.pop(owner, None)
+        # Idle user's finish tag is not above virtual time any more (all their jobs were
+        # dispatched or cancelled), so dropping it does not change fairness
+        if ('user', job.user_id) not in self._active and ('user', job.user_id) not in self._queued:
+            self._last_finish.pop(job.user_id, None)
+
+    def _expire_running(self):
+        """Reclaim slots of jobs running longer than DOWNLOAD_TIMEOUT (lock must be held)"""
+        deadline = self._clock() - LimitsConfig.DOWNLOAD_TIMEOUT
+        for job in [job for job in self._running.values() if job.started_at < deadline]:
+            print(f"Job {job.job_id} of user {job.user_id} exceeded DOWNLOAD_TIMEOUT, slot released")
+            self._release(job, STATE_DONE)
+            self.expired += 1
+
+    def finish(self, job: Job):
+        """Mark job finished (or failed) and start next waiting jobs"""
+        with self._lock:
+            self._release(job, STATE_DONE)
+            self._expire_running()
+            started = self._dispatch()
+        self._notify(started)
+
+    def cancel(self, job: Job):
+        """Remove waiting job from queue (running job is finished)"""
+        with self._lock:
+            self._release(job, STATE_CANCELLED if job.state == STATE_QUEUED else STATE_DONE)
+            started = self._dispatch()
+        job._started.set()
+        self._notify(started)
+
+    def position(self, job: Job) -> int:
+        """1-based position of job in queue, 0 if job is not waiting"""
+        with self._lock:
+            if job.state != STATE_QUEUED:
+                return 0
+            return bisect.bisect_left(self._queue, (job.finish_tag, job.job_id)) + 1
+
+    def format_position(self, job: Job, user_id: int = None) -> str:
+        """Get queue position message for user (replaces AUDIO_WAIT_MSG)"""
+        from CONFIG.LANGUAGES.language_router import format_message
+        with self._lock:
+            total = len(self._queue)
+        return format_message('QUEUE_POSITION_MSG', user_id=user_id or job.user_id,
+                              position=self.position(job), total=total)
+
+    def user_jobs(self, user_id: int) -> List[Job]:
+        """Get running and waiting jobs of user"""
+        with self._lock:
+            running = [job for job in self._running.values() if job.user_id == user_id]
+            return running + [job for _, _, job in self._queue if job.user_id == user_id]
+
+    def stats(self) -> Dict[str, int]:
+        """Get scheduler counters"""
+        with self._lock:
+            return {
+                'running': len(self._running),
+                'queued': len(self._queue),
+                'rejected': self.rejected,
+                'expired': self.expired,
+                'max_active': self.max_active,
+            }
+
+
+# Global instance
+job_scheduler = JobScheduler()
@@ -0,0 +1,233 @@
+# Keyword Matcher
+# Aho-Corasick automaton over porn keywords with WHITE_KEYWORDS suppression:
+# all keywords found in URL/title/description are reported in a single pass over the text
+
+import os
+import time
+import bisect
+from typing import Iterable, List, Tuple
+
+from CONFIG.domains import DomainsConfig
+
+
+class KeywordMatcher(object):
+    """Multi-pattern keyword matcher (Aho-Corasick) with whitelist suppression"""
+
+    def __init__(self, keywords: Iterable[str], white_keywords: Iterable[str] = ()):
+        # Node i: _goto[i] maps char -> node, _fail[i] is fallback node,
+        # _out[i] is tuple of (pattern length, pattern, is_whitelisted) ending at node
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.keywords = []
+        self.white_keywords = []
+
+        for keyword in keywords:
+            keyword = keyword.strip().lower()
+            if keyword:
+                self.keywords.append(keyword)
+                self._add(keyword, False)
+        for keyword in white_keywords:
+            keyword = keyword.strip().lower()
+            if keyword:
+                self.white_keywords.append(keyword)
+                self._add(keyword, True)
+        self._has_whitelist = bool(self.white_keywords)
+        self._build()
+
+    def _add(self, pattern: str, whitelisted: bool):
+        """Add pattern to trie"""
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = next_node
+        if all(existing[1] != pattern for existing in self._out[node]):
+            self._out[node] = self._out[node] + ((len(pattern), pattern, whitelisted),)
+
+    def _build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = list(self._goto[0].values())
+        index = 0
+        while index < len(queue):
+            node = queue[index]
+            index += 1
+            for char, next_node in self._goto[node].items():
+                queue.append(next_node)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_target = self._goto[fail].get(char, 0)
+                self._fail[next_node] = fail_target if fail_target != next_node else 0
+                if self._out[self._fail[next_node]]:
+                    self._out[next_node] = self._out[next_node] + self._out[self._fail[next_node]]
+
+    def _scan(self, text: str):
+        """Yield (start, end, pattern, is_whitelisted) for every occurrence in text"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+        for position, char in enumerate(text.lower()):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                end = position + 1
+                for length, pattern, whitelisted in out[node]:
+                    yield end - length, end, pattern, whitelisted
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Find all keyword occurrences in text
+        Occurrences inside a whitelisted keyword (e.g. "ass" in "assassinate") are dropped
+        Returns list of (start position, keyword)
+        """
+        if not text:
+            return []
+        found = []
+        white_spans = []
+        for start, end, pattern, whitelisted in self._scan(text):
+            if whitelisted:
+                white_spans.append((start, end))
+            else:
+                found.append((start, end, pattern))
+        if white_spans:
+            found = [
+                (start, end, pattern) for start, end, pattern in found
+                if not any(white_start <= start and end <= white_end for white_start, white_end in white_spans)
+            ]
+        return [(start, pattern) for start, _, pattern in found]
+
+    def matches(self, text: str) -> List[str]:
+        """Get unique keywords found in text, in order of first occurrence"""
+        seen = {}
+        for _, keyword in self.find_all(text):
+            seen.setdefault(keyword, None)
+        return list(seen)
+
+    def matches_many(self, texts: List[str]) -> List[List[str]]:
+        """
+        Get unique keywords of every text with one automaton pass over all texts joined by newline
+        (keywords are single lines, so no match can cross a text boundary)
+        """
+        results = [[] for _ in texts]
+        if not texts:
+            return results
+        # Offsets are taken from lowered texts, as _scan matches lowered text
+        # (lowering may change length, e.g. 'İ' becomes two characters)
+        texts = [text.lower() for text in texts]
+        # Start offset of every text in joined buffer
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + 1
+        seen = [set() for _ in texts]
+        for start, keyword in self.find_all('\n'.join(texts)):
+            index = bisect.bisect_right(offsets, start) - 1
+            if keyword not in seen[index]:
+                seen[index].add(keyword)
+                results[index].append(keyword)
+        return results
+
+    def search(self, text: str) -> bool:
+        """Check if text contains any keyword (stops at first match if there is no whitelist)"""
+        if not text:
+            return False
+        if self._has_whitelist:
+            return bool(self.find_all(text))
+        for _ in self._scan(text):
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+
+def read_keywords(path: str) -> List[str]:
+    """Read keywords file, one keyword per line (empty lines and # comments are skipped)"""
+    keywords = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    keywords.append(line.lower())
+    except FileNotFoundError:
+        print(f"Keywords file not found: {path}")
+    return keywords
+
+
+def load_keyword_matcher(path: str = None) -> KeywordMatcher:
+    """Build keyword matcher from PORN_KEYWORDS_FILE and WHITE_KEYWORDS"""
+    if path is None:
+        path = DomainsConfig.PORN_KEYWORDS_FILE
+    return KeywordMatcher(read_keywords(path), DomainsConfig.WHITE_KEYWORDS)
+
+
+def naive_matches(keywords: List[str], white_keywords: List[str], text: str) -> List[str]:
+    """Reference implementation: one substring scan per keyword (used for benchmark)"""
+    text = text.lower()
+    for white_keyword in white_keywords:
+        text = text.replace(white_keyword, ' ')
+    return [keyword for keyword in keywords if keyword in text]
+
+
+def benchmark(keywords: List[str] = None, white_keywords: List[str] = None,
+              texts: List[str] = None, repeat: int = 3) -> dict:
+    """
+    Compare automaton against naive per-keyword loop
+    Returns dict with build_ms, automaton_ms and naive_ms (best of repeat, for all texts)
+    """
+    if keywords is None:
+        keywords = read_keywords(DomainsConfig.PORN_KEYWORDS_FILE)
+    if white_keywords is None:
+        white_keywords = DomainsConfig.WHITE_KEYWORDS
+    if texts is None:
+        texts = [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ Rick Astley - Never Gonna Give You Up (Official Video)",
+            "https://vm.tiktok.com/ZMabcdef/ funny cat compilation #cats #funny #viral",
+            "https://www.instagram.com/p/Cabcdef/ Summer trip to the mountains with friends",
+            "The assassination of a historical figure: documentary, part 1 of 3",
+        ] * 25
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keywords, white_keywords)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def best(function):
+        best_time = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for text in texts:
+                function(text)
+            elapsed = time.perf_counter() - start
+            best_time = elapsed if best_time is None else min(best_time, elapsed)
+        return best_time * 1000
+
+    return {
+        'keywords': len(keywords),
+        'texts': len(texts),
+        'build_ms': build_ms,
+        'automaton_ms': best(matcher.matches),
+        'naive_ms': best(lambda text: naive_matches(keywords, white_keywords, text)),
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    keywords_path = sys.argv[1] if len(sys.argv) > 1 else DomainsConfig.PORN_KEYWORDS_FILE
+    if not os.path.exists(keywords_path):
+        print(f"Keywords file not found: {keywords_path}")
+        sys.exit(1)
+    result = benchmark(read_keywords(keywords_path))
+    print(f"{result['keywords']} keywords, {result['texts']} texts")
+    print(f"build:     {result['build_ms']:.2f} ms")
+    print(f"automaton: {result['automaton_ms']:.2f} ms")
+    print(f"naive:     {result['naive_ms']:.2f} ms")
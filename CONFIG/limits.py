@@ -30,6 +30,13 @@ class LimitsConfig(object):
     # If no new files are found for this time, download stops (prevents infinite waiting)
     MAX_IMG_INACTIVITY_TIME = 300  # 5 minutes
     
+    # Sharded /img downloads: large ranges are split between parallel gallery-dl processes
+    IMG_SHARDS = 4  # max shards per download
+    IMG_MIN_SHARD_SIZE = 50  # items, smaller ranges are not split
+    # Max parallel gallery-dl processes per site (all users together), to stay under rate limits
+    IMG_DOMAIN_CONCURRENCY = 3
+    IMG_DOMAIN_CONCURRENCY_OVERRIDES = {'instagram.com': 2, 'tiktok.com': 2}
+    
     # Example configurations for different scenarios:
     # For fast internet and small files: MAX_IMG_RANGE_WAIT_TIME = 600 (10 min), MAX_IMG_TOTAL_WAIT_TIME = 3600 (1 hour)
     # For slow internet and large files: MAX_IMG_RANGE_WAIT_TIME = 3600 (1 hour), MAX_IMG_TOTAL_WAIT_TIME = 28800 (8 hours)
@@ -38,5 +45,11 @@ class LimitsConfig(object):
     # Group multipliers (applied in groups/channels) - except quality
     GROUP_MULTIPLIER = 2
     #######################################################
+    # Download scheduler slots (user slots and queue are multiplied by GROUP_MULTIPLIER in groups)
+    MAX_ACTIVE_DOWNLOADS = 8  # all users together
+    MAX_USER_ACTIVE_DOWNLOADS = 1  # per user/group
+    MAX_USER_QUEUED_DOWNLOADS = 5  # waiting jobs per user/group, more are rejected
+    MAX_QUEUED_DOWNLOADS = 200  # waiting jobs of all users together
+    #######################################################
     NSFW_STAR_COST = 1
     
\ No newline at end of file
@@ -0,0 +1,162 @@
+# Porn Domain Index
+# Sorted domain index stored next to PORN_DOMAINS_FILE and memory-mapped by every bot process,
+# hosts are checked by binary search of each of their suffixes
+#
+# File layout (little-endian):
+#   magic (8 bytes) | count (uint32) | offsets (uint32 * (count + 1)) | domains (utf-8, sorted, no separators)
+# Domain i occupies domains[offsets[i]:offsets[i + 1]]
+
+import os
+import sys
+import mmap
+import struct
+import threading
+from typing import Iterable, Optional
+
+from CONFIG.domains import DomainsConfig
+
+INDEX_MAGIC = b'PDIDX01\n'
+INDEX_EXTENSION = '.idx'
+_HEADER = struct.Struct('<8sI')
+_OFFSET = struct.Struct('<I')
+
+
+def get_index_path(txt_path: str = None) -> str:
+    """Get index path for domains TXT file"""
+    if txt_path is None:
+        txt_path = DomainsConfig.PORN_DOMAINS_FILE
+    return txt_path + INDEX_EXTENSION
+
+
+def read_domains(txt_path: str) -> Iterable[str]:
+    """Read domains file, one domain per line (empty lines and # comments are skipped)"""
+    with open(txt_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            domain = line.strip().lower().rstrip('.')
+            if domain and not domain.startswith('#'):
+                yield domain
+
+
+def build_domain_index(txt_path: str = None, index_path: str = None) -> int:
+    """
+    Build sorted index from domains TXT file
+    Index is written to a temp file and atomically renamed, so readers never see a partial index
+    Returns number of indexed domains
+    """
+    if txt_path is None:
+        txt_path = DomainsConfig.PORN_DOMAINS_FILE
+    if index_path is None:
+        index_path = get_index_path(txt_path)
+
+    domains = sorted({domain.encode('utf-8') for domain in read_domains(txt_path)})
+    offsets = [0]
+    for domain in domains:
+        offsets.append(offsets[-1] + len(domain))
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, len(domains)))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(b''.join(domains))
+    os.replace(tmp_path, index_path)
+    return len(domains)
+
+
+class PornDomainIndex(object):
+    """Read-only memory-mapped domain index shared between processes through page cache"""
+
+    def __init__(self, index_path: str = None):
+        if index_path is None:
+            index_path = get_index_path()
+        self.index_path = index_path
+        # (mmap, offsets, data start) swapped as one tuple on reload
+        self._state = (None, (), 0)
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> int:
+        """
+        Map current index file and swap it in, old mapping is released once no lookup uses it
+        Returns number of domains in index
+        """
+        with self._lock:
+            if not os.path.exists(self.index_path) or os.path.getsize(self.index_path) < _HEADER.size:
+                self._state = (None, (), 0)
+                return 0
+            with open(self.index_path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = _HEADER.unpack_from(data, 0)
+            if magic != INDEX_MAGIC:
+                data.close()
+                raise ValueError(f"Not a domain index: {self.index_path}")
+            data_start = _HEADER.size + (count + 1) * _OFFSET.size
+            offsets = memoryview(data)[_HEADER.size:data_start]
+            # Offsets are read in place when native byte order matches the file
+            offsets = offsets.cast('I') if sys.byteorder == 'little' and struct.calcsize('I') == 4 else \
+                struct.unpack(f'<{count + 1}I', offsets)
+            self._state = (data, offsets, data_start)
+            return count
+
+    def __len__(self) -> int:
+        return max(len(self._state[1]) - 1, 0)
+
+    def contains(self, domain: str) -> bool:
+        """Check if exact domain is in index"""
+        return self._contains(self._state, domain.lower().encode('utf-8'))
+
+    def _contains(self, state, key: bytes) -> bool:
+        data, offsets, data_start = state
+        if data is None:
+            return False
+        low, high = 0, len(offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            value = data[data_start + offsets[middle]:data_start + offsets[middle + 1]]
+            if value < key:
+                low = middle + 1
+            elif value > key:
+                high = middle
+            else:
+                return True
+        return False
+
+    def match_host(self, host: str) -> Optional[str]:
+        """
+        Check host and all of its parent domains against index
+        Returns matched domain or None
+        """
+        state = self._state
+        if state[0] is None or not host:
+            return None
+        labels = host.lower().rstrip('.').split('.')
+        # Shortest suffix first: parent domains are more likely to be listed
+        for index in range(len(labels) - 1, -1, -1):
+            suffix = '.'.join(labels[index:])
+            if self._contains(state, suffix.encode('utf-8')):
+                return suffix
+        return None
+
+    def close(self):
+        """Release mapping"""
+        with self._lock:
+            data, offsets, _ = self._state
+            self._state = (None, (), 0)
+        if isinstance(offsets, memoryview):
+            offsets.release()
+        if data is not None:
+            data.close()
+
+
+def load_porn_domain_index(txt_path: str = None) -> PornDomainIndex:
+    """Open index for PORN_DOMAINS_FILE, (re)building it if it is missing or older than TXT file"""
+    if txt_path is None:
+        txt_path = DomainsConfig.PORN_DOMAINS_FILE
+    index_path = get_index_path(txt_path)
+    try:
+        if os.path.exists(txt_path) and (
+            not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(txt_path)
+        ):
+            build_domain_index(txt_path, index_path)
+    except Exception as e:
+        print(f"Error building porn domain index: {e}")
+    return PornDomainIndex(index_path)
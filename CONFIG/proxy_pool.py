@@ -0,0 +1,315 @@
+# Proxy Pool
+# Multi-proxy selection for yt-dlp/gallery-dl with round-robin, random, least-latency and
+# sticky-per-domain strategies. Tracks rolling success rate, latency and throughput per proxy
+# and ejects unhealthy proxies for a growing cooldown, so failed downloads stop burning retries
+# on dead proxies. PROXY_DOMAINS/PROXY_2_DOMAINS stay pinned to their proxies while healthy.
+# FakeProxyServer is a local HTTP proxy stand-in for tests (see check_pool)
+
+import time
+import random
+import socket
+import threading
+import socketserver
+import zlib
+from collections import deque
+from urllib.parse import urlsplit
+from typing import Callable, List, Optional
+
+from CONFIG.domain_classifier import DomainCategory, domain_classifier, get_url_host
+
+STRATEGY_ROUND_ROBIN = 'round_robin'
+STRATEGY_RANDOM = 'random'
+STRATEGY_LEAST_LATENCY = 'least_latency'
+STRATEGY_STICKY = 'sticky'
+STRATEGIES = (STRATEGY_ROUND_ROBIN, STRATEGY_RANDOM, STRATEGY_LEAST_LATENCY, STRATEGY_STICKY)
+
+
+class ProxyStats(object):
+    """Rolling outcome window of one proxy"""
+
+    def __init__(self, window: int):
+        # (success, latency in seconds or None, throughput in bytes/s or None)
+        self.outcomes = deque(maxlen=window)
+
+    @property
+    def samples(self) -> int:
+        return len(self.outcomes)
+
+    @property
+    def success_rate(self) -> float:
+        if not self.outcomes:
+            return 1.0
+        return sum(1 for success, _, _ in self.outcomes if success) / len(self.outcomes)
+
+    @property
+    def latency(self) -> Optional[float]:
+        latencies = [latency for success, latency, _ in self.outcomes if success and latency is not None]
+        return sum(latencies) / len(latencies) if latencies else None
+
+    @property
+    def throughput(self) -> Optional[float]:
+        speeds = [speed for success, _, speed in self.outcomes if success and speed is not None]
+        return sum(speeds) / len(speeds) if speeds else None
+
+
+class Proxy(object):
+    """Proxy server with health state"""
+
+    def __init__(self, url: str, name: str = None, window: int = 20):
+        self.url = url
+        self.name = name or url
+        self.stats = ProxyStats(window)
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def __repr__(self) -> str:
+        return f"<Proxy {self.name} success={self.stats.success_rate:.2f} latency={self.stats.latency}>"
+
+
+def _latency_rank(proxy: Proxy) -> tuple:
+    """
+    Sort key of least-latency strategy: untested proxies first (latency 0) so they are tried,
+    proxies with failures and no successes last (latency inf), otherwise by latency
+    """
+    latency = proxy.stats.latency
+    if latency is None:
+        latency = 0.0 if proxy.stats.samples == 0 else float('inf')
+    return latency, -proxy.stats.success_rate
+
+
+class ProxyPool(object):
+    """Health-scored proxy pool"""
+
+    def __init__(self, proxies: List[Proxy], strategy: str = STRATEGY_ROUND_ROBIN,
+                 min_success_rate: float = 0.5, min_samples: int = 5,
+                 cooldown: float = 60, max_cooldown: float = 1800,
+                 clock: Callable[[], float] = time.monotonic):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown proxy selection strategy: {strategy}")
+        self.proxies = list(proxies)
+        self.strategy = strategy
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_index = 0
+        self._sticky = {}
+        # DomainCategory -> proxy name, e.g. PROXY_DOMAINS are pinned to proxy named 'PROXY'
+        self.pinned = {DomainCategory.PROXY: 'PROXY', DomainCategory.PROXY_2: 'PROXY_2'}
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def get(self, name: str) -> Optional[Proxy]:
+        """Get proxy by name"""
+        for proxy in self.proxies:
+            if proxy.name == name:
+                return proxy
+        return None
+
+    def healthy(self) -> List[Proxy]:
+        """Get proxies that are not ejected"""
+        now = self._clock()
+        return [proxy for proxy in self.proxies if proxy.is_healthy(now)]
+
+    def select(self, url: str = None) -> Optional[Proxy]:
+        """
+        Select proxy for URL
+        Domains pinned by PROXY_DOMAINS/PROXY_2_DOMAINS use their proxy while it is healthy,
+        if every proxy is ejected the one that returns soonest is used
+        """
+        if not self.proxies:
+            return None
+        host = get_url_host(url) if url else ''
+        now = self._clock()
+
+        if host:
+            categories = domain_classifier.classify_host(host)
+            for category, name in self.pinned.items():
+                if categories & category:
+                    proxy = self.get(name)
+                    if proxy is not None and proxy.is_healthy(now):
+                        return proxy
+
+        with self._lock:
+            candidates = [proxy for proxy in self.proxies if proxy.is_healthy(now)]
+            if not candidates:
+                return min(self.proxies, key=lambda proxy: proxy.ejected_until)
+
+            if self.strategy == STRATEGY_RANDOM:
+                return random.choice(candidates)
+
+            if self.strategy == STRATEGY_LEAST_LATENCY:
+                return min(candidates, key=_latency_rank)
+
+            if self.strategy == STRATEGY_STICKY and host:
+                proxy = self._sticky.get(host)
+                if proxy is None or proxy not in candidates:
+                    proxy = candidates[zlib.crc32(host.encode('utf-8')) % len(candidates)]
+                    self._sticky[host] = proxy
+                return proxy
+
+            proxy = candidates[self._next_index % len(candidates)]
+            self._next_index += 1
+            return proxy
+
+    def report_success(self, proxy: Proxy, latency: float = None, bytes_downloaded: int = None,
+                       duration: float = None):
+        """Record successful request/download through proxy"""
+        throughput = bytes_downloaded / duration if bytes_downloaded and duration else None
+        with self._lock:
+            proxy.stats.outcomes.append((True, latency, throughput))
+            proxy.ejections = 0
+
+    def report_failure(self, proxy: Proxy):
+        """Record failed request/download through proxy, ejects proxy if it became unhealthy"""
+        with self._lock:
+            proxy.stats.outcomes.append((False, None, None))
+            if proxy.stats.samples >= self.min_samples and proxy.stats.success_rate < self.min_success_rate:
+                self._eject(proxy)
+
+    def _eject(self, proxy: Proxy):
+        """Eject proxy for cooldown doubling with every consecutive ejection"""
+        cooldown = min(self.cooldown * (2 ** proxy.ejections), self.max_cooldown)
+        proxy.ejections += 1
+        proxy.ejected_until = self._clock() + cooldown
+        # Proxy gets a fresh window on probation after cooldown
+        proxy.stats.outcomes.clear()
+        for host, sticky_proxy in list(self._sticky.items()):
+            if sticky_proxy is proxy:
+                del self._sticky[host]
+        print(f"Proxy {proxy.name} ejected for {cooldown:.0f}s")
+
+    def probe(self, proxy: Proxy, target: str = 'http://www.gstatic.com/generate_204', timeout: float = 10) -> bool:
+        """Send one HTTP request through proxy and record outcome"""
+        start = self._clock()
+        if probe_proxy(proxy.url, target, timeout):
+            self.report_success(proxy, latency=self._clock() - start)
+            return True
+        self.report_failure(proxy)
+        return False
+
+    def stats(self) -> List[dict]:
+        """Get per-proxy statistics"""
+        now = self._clock()
+        with self._lock:
+            return [{
+                'name': proxy.name,
+                'healthy': proxy.is_healthy(now),
+                'success_rate': proxy.stats.success_rate,
+                'latency': proxy.stats.latency,
+                'throughput': proxy.stats.throughput,
+                'samples': proxy.stats.samples,
+                'ejected_for': max(proxy.ejected_until - now, 0.0),
+            } for proxy in self.proxies]
+
+
+def probe_proxy(proxy_url: str, target: str, timeout: float = 10) -> bool:
+    """Check that HTTP proxy answers a plain GET request with a non-5xx status"""
+    parts = urlsplit(proxy_url)
+    try:
+        with socket.create_connection((parts.hostname, parts.port or 8080), timeout=timeout) as connection:
+            host = urlsplit(target).netloc
+            connection.sendall(f"GET {target} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+            status_line = connection.recv(64).split(b'\r\n', 1)[0].split()
+        return len(status_line) >= 2 and status_line[1].isdigit() and int(status_line[1]) < 500
+    except (OSError, ValueError):
+        return False
+
+
+class FakeProxyServer(object):
+    """
+    Local fake HTTP proxy for tests
+    mode: 'ok' answers every request, 'dead' drops connections, 'flaky' fails with failure_rate,
+    latency adds delay before answering
+    """
+
+    def __init__(self, mode: str = 'ok', latency: float = 0.0, failure_rate: float = 0.5,
+                 payload: bytes = b'fake-proxy'):
+        self.mode = mode
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.payload = payload
+        self.requests = 0
+        fake = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                fake.requests += 1
+                try:
+                    self.request.recv(4096)
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    if fake.mode == 'dead' or (fake.mode == 'flaky' and random.random() < fake.failure_rate):
+                        return
+                    self.request.sendall(
+                        b"HTTP/1.1 200 OK\r\nContent-Length: " + str(len(fake.payload)).encode()
+                        + b"\r\nConnection: close\r\n\r\n" + fake.payload
+                    )
+                except OSError:
+                    pass
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeProxyServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeProxyServer':
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def check_pool(rounds: int = 12) -> List[str]:
+    """
+    Check selection against local fake proxies: least-latency never comes back to a dead proxy,
+    round-robin ejects it after min_samples failures
+    Returns list of failures (empty if everything holds)
+    """
+    failures = []
+    target = 'http://example.com/'
+    with FakeProxyServer('ok', latency=0.05) as good, FakeProxyServer('dead') as dead:
+        for strategy in (STRATEGY_LEAST_LATENCY, STRATEGY_ROUND_ROBIN):
+            pool = ProxyPool([Proxy(dead.url, 'dead'), Proxy(good.url, 'good')], strategy, min_samples=3)
+            selected = []
+            for _ in range(rounds):
+                proxy = pool.select()
+                selected.append(proxy.name)
+                pool.probe(proxy, target, timeout=2)
+            dead_count = selected.count('dead')
+            if strategy == STRATEGY_LEAST_LATENCY and dead_count > 1:
+                failures.append(f"{strategy}: dead proxy selected {dead_count} times: {selected}")
+            if strategy == STRATEGY_ROUND_ROBIN:
+                if dead_count > pool.min_samples:
+                    failures.append(f"{strategy}: dead proxy selected {dead_count} times: {selected}")
+                if pool.get('dead').ejections != 1:
+                    failures.append(f"{strategy}: dead proxy was not ejected: {pool.stats()}")
+            if pool.get('good').stats.success_rate != 1.0:
+                failures.append(f"{strategy}: good proxy failed: {pool.stats()}")
+    return failures
+
+
+if __name__ == '__main__':
+    failures = check_pool()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"proxy pool: {'OK' if not failures else f'{len(failures)} failed'}")
@@ -0,0 +1,229 @@
+# Size Estimator
+# Output size of yt-dlp formats predicted from info metadata (filesize, filesize_approx,
+# bitrate x duration) before anything is downloaded. Oversize requests are rejected or downgraded
+# to the best format that fits MAX_FILE_SIZE_GB, instead of hitting ERROR_FILE_SIZE_LIMIT_MSG
+# after the bytes were fetched. Estimates are cached per (video, format)
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from CONFIG.limits import LimitsConfig
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+
+# Estimate sources, most reliable first
+SOURCE_FILESIZE = 'filesize'
+SOURCE_APPROX = 'filesize_approx'
+SOURCE_BITRATE = 'bitrate'
+_SOURCE_ORDER = [SOURCE_FILESIZE, SOURCE_APPROX, SOURCE_BITRATE]
+
+# Bitrate estimates ignore container overhead and VBR peaks
+BITRATE_OVERHEAD = 1.05
+
+ACTION_ACCEPT = 'accept'
+ACTION_DOWNGRADE = 'downgrade'
+ACTION_REJECT = 'reject'
+
+
+class SizeEstimate(object):
+    """Predicted size of a format (or video+audio pair)"""
+
+    __slots__ = ('bytes', 'source', 'format_id', 'height')
+
+    def __init__(self, size: Optional[int], source: Optional[str], format_id: str = None, height: int = None):
+        self.bytes = size
+        self.source = source
+        self.format_id = format_id
+        self.height = height
+
+    @property
+    def known(self) -> bool:
+        return self.bytes is not None
+
+    def __repr__(self) -> str:
+        size = f"{self.bytes / MIB:.1f}MB" if self.bytes is not None else 'unknown'
+        return f"<SizeEstimate {self.format_id} {size} ({self.source})>"
+
+
+class SizeVerdict(object):
+    """Early decision for requested download"""
+
+    __slots__ = ('action', 'estimate', 'format_id', 'message_key', 'params')
+
+    def __init__(self, action: str, estimate: SizeEstimate = None, format_id: str = None,
+                 message_key: str = None, **params):
+        self.action = action
+        self.estimate = estimate
+        # Format selector to download with (downgraded format for ACTION_DOWNGRADE)
+        self.format_id = format_id
+        self.message_key = message_key
+        self.params = params
+
+    def format(self, user_id: int = None) -> Optional[str]:
+        """Get rejection message in user's language"""
+        if self.message_key is None:
+            return None
+        from CONFIG.LANGUAGES.language_router import format_message
+        return format_message(self.message_key, user_id=user_id, **self.params)
+
+    def __repr__(self) -> str:
+        return f"<SizeVerdict {self.action} {self.format_id} {self.estimate}>"
+
+
+def _is_audio_only(fmt: dict) -> bool:
+    return fmt.get('vcodec') == 'none' and fmt.get('acodec') not in (None, 'none')
+
+
+def _is_video_only(fmt: dict) -> bool:
+    return fmt.get('acodec') == 'none' and fmt.get('vcodec') not in (None, 'none')
+
+
+def estimate_format_size(fmt: dict, duration: float = None) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Predict size of one format
+    Returns (bytes, source) or (None, None) if metadata is not enough
+    """
+    if fmt.get('filesize'):
+        return int(fmt['filesize']), SOURCE_FILESIZE
+    if fmt.get('filesize_approx'):
+        return int(fmt['filesize_approx']), SOURCE_APPROX
+    # tbr/vbr/abr are in kbit/s
+    bitrate = fmt.get('tbr') or ((fmt.get('vbr') or 0) + (fmt.get('abr') or 0))
+    duration = duration or fmt.get('duration')
+    if bitrate and duration:
+        return int(bitrate * 1000 / 8 * duration * BITRATE_OVERHEAD), SOURCE_BITRATE
+    return None, None
+
+
+class SizeEstimator(object):
+    """Format size estimates with per-format cache"""
+
+    def __init__(self, cache_size: int = 20000):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def estimate(self, info: dict, fmt: dict) -> SizeEstimate:
+        """Get (cached) size estimate of format of video info"""
+        key = (info.get('extractor_key') or info.get('extractor'), info.get('id'), fmt.get('format_id'))
+        cacheable = key[1] is not None and key[2] is not None
+        if cacheable:
+            with self._lock:
+                estimate = self._cache.get(key)
+                if estimate is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return estimate
+                self.misses += 1
+        size, source = estimate_format_size(fmt, info.get('duration'))
+        estimate = SizeEstimate(size, source, fmt.get('format_id'), fmt.get('height'))
+        if cacheable:
+            with self._lock:
+                self._cache[key] = estimate
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return estimate
+
+    def estimate_info(self, info: dict) -> SizeEstimate:
+        """
+        Get size estimate of format yt-dlp selected for info
+        (requested_formats of merged video+audio are summed, unknown if any part is unknown)
+        """
+        requested = info.get('requested_formats')
+        if requested:
+            estimates = [self.estimate(info, fmt) for fmt in requested]
+            if not all(estimate.known for estimate in estimates):
+                # Audio size alone would pass for the whole download
+                return SizeEstimate(None, None, info.get('format_id'), info.get('height'))
+            # Sum is only as reliable as its least reliable part
+            source = max((estimate.source for estimate in estimates), key=_SOURCE_ORDER.index)
+            return SizeEstimate(sum(estimate.bytes for estimate in estimates), source,
+                                '+'.join(str(fmt.get('format_id')) for fmt in requested), info.get('height'))
+        return self.estimate(info, info)
+
+    def candidates(self, info: dict) -> List[SizeEstimate]:
+        """
+        Size estimates of every downloadable choice of info: progressive formats and
+        video-only formats paired with best audio-only format, biggest height first
+        """
+        formats = info.get('formats') or []
+        audio = [self.estimate(info, fmt) for fmt in formats if _is_audio_only(fmt)]
+        audio = [estimate for estimate in audio if estimate.known]
+        best_audio = max(audio, key=lambda estimate: estimate.bytes) if audio else None
+
+        choices = []
+        for fmt in formats:
+            if _is_audio_only(fmt):
+                continue
+            estimate = self.estimate(info, fmt)
+            if not estimate.known:
+                continue
+            if _is_video_only(fmt) and best_audio is not None:
+                estimate = SizeEstimate(estimate.bytes + best_audio.bytes, estimate.source,
+                                        f"{estimate.format_id}+{best_audio.format_id}", estimate.height)
+            choices.append(estimate)
+        choices.sort(key=lambda estimate: (estimate.height or 0, estimate.bytes), reverse=True)
+        return choices
+
+    def check(self, info: dict, group_id: int = None, max_size_gb: float = None) -> SizeVerdict:
+        """
+        Decide before download: accept selected format, downgrade to the best format that fits
+        MAX_FILE_SIZE_GB (times GROUP_MULTIPLIER in groups), or reject
+        """
+        multiplier = LimitsConfig.GROUP_MULTIPLIER if group_id else 1
+        if max_size_gb is None:
+            max_size_gb = LimitsConfig.MAX_FILE_SIZE_GB * multiplier
+        max_duration = LimitsConfig.MAX_VIDEO_DURATION * multiplier
+        duration = info.get('duration')
+        if duration and duration > max_duration:
+            return SizeVerdict(ACTION_REJECT, message_key='QUEUE_DURATION_LIMIT_MSG', limit=max_duration)
+
+        limit = max_size_gb * GIB
+        selected = self.estimate_info(info)
+        if not selected.known or selected.bytes <= limit:
+            # Unknown size is accepted, yt-dlp max_filesize still guards the download
+            return SizeVerdict(ACTION_ACCEPT, selected, info.get('format_id'))
+
+        for candidate in self.candidates(info):
+            if candidate.bytes <= limit:
+                return SizeVerdict(ACTION_DOWNGRADE, candidate, candidate.format_id)
+        return SizeVerdict(ACTION_REJECT, selected, message_key='ERROR_FILE_SIZE_LIMIT_MSG', limit=max_size_gb)
+
+    def can_embed_subs(self, info: dict) -> bool:
+        """Check MAX_SUB_SIZE, MAX_SUB_DURATION and MAX_SUB_QUALITY before downloading subtitles"""
+        duration = info.get('duration')
+        if duration and duration > LimitsConfig.MAX_SUB_DURATION:
+            return False
+        width, height = info.get('width'), info.get('height')
+        if width and height and min(width, height) > LimitsConfig.MAX_SUB_QUALITY:
+            return False
+        estimate = self.estimate_info(info)
+        if estimate.known and estimate.bytes > LimitsConfig.MAX_SUB_SIZE * MIB:
+            return False
+        return True
+
+    def stats(self) -> dict:
+        """Get cache statistics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._cache),
+            }
+
+
+# Global instance
+size_estimator = SizeEstimator()
+
+
+def check_download_size(info: dict, group_id: int = None) -> SizeVerdict:
+    """
+    Convenience function to get early size verdict for yt-dlp info
+    """
+    return size_estimator.check(info, group_id)
@@ -0,0 +1,157 @@
+# Supported Sites
+# SUPPORTED_SITES_FILE compiled into a host index at startup, so unsupported URLs can be
+# rejected or routed instantly instead of paying for a yt-dlp --dump-json subprocess.
+# The file may list domains ("vimeo.com"), extractor names ("youtube:tab") or
+# supportedsites.md lines (" - **youtube**: YouTube"), all three are understood
+
+import re
+import threading
+from urllib.parse import urlsplit
+from typing import Optional
+
+from CONFIG.domains import DomainsConfig
+from CONFIG.domain_classifier import normalize_host
+from CONFIG.engine_router import Engine, engine_router
+
+# Direct media links are handled by yt-dlp generic extractor
+MEDIA_EXTENSIONS = ('.mp4', '.m4v', '.mkv', '.webm', '.mov', '.avi', '.flv', '.m3u8', '.mpd',
+                    '.mp3', '.m4a', '.ogg', '.opus', '.wav', '.flac')
+
+# Confidence of verdicts
+CONFIDENCE_DOMAIN = 1.0        # host (or parent domain) is listed
+CONFIDENCE_EXTRACTOR = 0.9     # host label equals extractor name (vimeo.com -> vimeo)
+CONFIDENCE_GALLERYDL = 0.9     # routed to gallery-dl, not yt-dlp
+CONFIDENCE_MEDIA_FILE = 0.8    # direct media link, generic extractor
+CONFIDENCE_FUZZY = 0.6         # host label equals extractor name without separators (1tv-ru -> 1tvru)
+CONFIDENCE_UNKNOWN = 0.2       # only generic extractor could work
+CONFIDENCE_INDEX_EMPTY = 0.5   # file missing or unreadable: nothing can be ruled out, fail open
+
+_MARKDOWN_NAME = re.compile(r'\*\*(.+?)\*\*')
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+class SupportVerdict(object):
+    """Result of supported sites check"""
+
+    __slots__ = ('supported', 'confidence', 'reason', 'matched')
+
+    def __init__(self, supported: bool, confidence: float, reason: str, matched: Optional[str] = None):
+        self.supported = supported
+        self.confidence = confidence
+        self.reason = reason
+        self.matched = matched
+
+    def __repr__(self) -> str:
+        return f"<SupportVerdict supported={self.supported} confidence={self.confidence} {self.reason}: {self.matched}>"
+
+
+class SupportedSitesIndex(object):
+    """Host index over SUPPORTED_SITES_FILE"""
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = DomainsConfig.SUPPORTED_SITES_FILE
+        self.path = path
+        # (domains, extractor names, fuzzy extractor names) swapped as one tuple on reload
+        self._state = (frozenset(), frozenset(), frozenset())
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'SupportedSitesIndex':
+        """Build index from SUPPORTED_SITES_FILE"""
+        index = cls()
+        index.reload()
+        return index
+
+    def reload(self) -> int:
+        """
+        Re-read SUPPORTED_SITES_FILE (admin reload hook)
+        Returns number of indexed entries
+        """
+        domains = set()
+        extractors = set()
+        try:
+            with open(self.path, 'r', encoding='utf-8', errors='ignore') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    markdown = _MARKDOWN_NAME.search(line)
+                    if markdown:
+                        line = markdown.group(1)
+                    name = line.split()[0].lower()
+                    if '://' in name:
+                        name = urlsplit(name).netloc
+                    if '.' in name and ':' not in name:
+                        domains.add(normalize_host(name))
+                    else:
+                        # "youtube:tab" and "youtube" are the same site
+                        extractors.add(name.split(':', 1)[0])
+        except FileNotFoundError:
+            print(f"Supported sites file not found: {self.path}")
+        except Exception as e:
+            print(f"Error loading supported sites: {e}")
+
+        fuzzy = frozenset(_NON_ALNUM.sub('', name) for name in extractors)
+        with self._lock:
+            self._state = (frozenset(domains), frozenset(extractors), fuzzy)
+        return len(domains) + len(extractors)
+
+    def __len__(self) -> int:
+        domains, extractors, _ = self._state
+        return len(domains) + len(extractors)
+
+    def check(self, url: str) -> SupportVerdict:
+        """Get supported sites verdict for URL"""
+        domains, extractors, fuzzy = self._state
+
+        url = url.strip()
+        try:
+            parts = urlsplit(url if '//' in url else '//' + url)
+        except ValueError:
+            return SupportVerdict(False, 0.0, 'invalid')
+        host = normalize_host(parts.netloc)
+        if not host:
+            return SupportVerdict(False, 0.0, 'invalid')
+        labels = host.split('.')
+
+        for index in range(len(labels)):
+            suffix = '.'.join(labels[index:])
+            if suffix in domains:
+                return SupportVerdict(True, CONFIDENCE_DOMAIN, 'domain', suffix)
+
+        if engine_router.route(url).engine == Engine.GALLERYDL:
+            return SupportVerdict(True, CONFIDENCE_GALLERYDL, 'gallery-dl', host)
+
+        # Labels without TLD, registrable label first: "music.youtube.com" -> "youtube", "music"
+        site_labels = labels[:-1] if len(labels) > 1 else labels
+        for label in reversed(site_labels):
+            if label in extractors:
+                return SupportVerdict(True, CONFIDENCE_EXTRACTOR, 'extractor', label)
+        for label in reversed(site_labels):
+            compact = _NON_ALNUM.sub('', label)
+            if compact and compact in fuzzy:
+                return SupportVerdict(True, CONFIDENCE_FUZZY, 'extractor-fuzzy', label)
+
+        if parts.path.lower().endswith(MEDIA_EXTENSIONS):
+            return SupportVerdict(True, CONFIDENCE_MEDIA_FILE, 'media-file', parts.path.rsplit('/', 1)[-1])
+
+        if not domains and not extractors:
+            # Without an index every site looks unsupported, let yt-dlp decide
+            return SupportVerdict(True, CONFIDENCE_INDEX_EMPTY, 'unknown', host)
+        return SupportVerdict(False, CONFIDENCE_UNKNOWN, 'unknown', host)
+
+    def is_likely_supported(self, url: str, min_confidence: float = 0.5) -> bool:
+        """Check if URL is worth a yt-dlp probe"""
+        return self.check(url).confidence >= min_confidence
+
+
+# Global instance compiled at import time
+supported_sites = SupportedSitesIndex.from_config()
+
+
+def reload_supported_sites() -> int:
+    """
+    Admin reload hook, returns number of indexed entries
+    """
+    return supported_sites.reload()
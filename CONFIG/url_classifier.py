@@ -0,0 +1,265 @@
+# URL Classifier
+# Full DomainsConfig verdict for a URL (porn check, CLEAN_QUERY, gallery-dl routing, proxy and cookie policy)
+# cached in an LRU keyed by normalized URL. Cached verdicts are invalidated by a lists version
+# counter that is bumped whenever domain or keyword lists are reloaded
+
+import threading
+from collections import OrderedDict
+from typing import Optional, List
+
+from CONFIG.domains import DomainsConfig
+from CONFIG.domain_classifier import DomainCategory, DomainClassifier, domain_classifier, get_url_host
+from CONFIG.keyword_matcher import KeywordMatcher, load_keyword_matcher
+from CONFIG.porn_domain_index import load_porn_domain_index
+from CONFIG.bloom_filter import PrefilteredDomainIndex, load_porn_bloom
+from CONFIG.url_normalizer import normalize_url
+from CONFIG.engine_router import Engine, EngineRouter, Route, engine_router
+
+
+class UrlVerdict(object):
+    """Classification result of one URL"""
+
+    __slots__ = ('url', 'host', 'categories', 'route', 'porn_domain', 'porn_keywords', 'version')
+
+    def __init__(self, url: str, host: str, categories: DomainCategory, route: Route,
+                 porn_domain: Optional[str], porn_keywords: List[str], version: int):
+        self.url = url
+        self.host = host
+        self.categories = categories
+        self.route = route
+        self.porn_domain = porn_domain
+        self.porn_keywords = porn_keywords
+        self.version = version
+
+    @property
+    def is_porn(self) -> bool:
+        """URL is NSFW by domain lists or URL keywords (WHITELIST domains are never NSFW)"""
+        if self.categories & DomainCategory.WHITELIST:
+            return False
+        return bool(self.categories & DomainCategory.BLACK_LIST or self.porn_domain or self.porn_keywords)
+
+    @property
+    def clean_query(self) -> bool:
+        """Query and fragment can be dropped"""
+        return bool(self.categories & DomainCategory.CLEAN_QUERY)
+
+    @property
+    def proxy(self) -> Optional[str]:
+        """Pinned proxy: 'PROXY' for PROXY_DOMAINS, 'PROXY_2' for PROXY_2_DOMAINS, None otherwise"""
+        if self.categories & DomainCategory.PROXY:
+            return 'PROXY'
+        if self.categories & DomainCategory.PROXY_2:
+            return 'PROXY_2'
+        return None
+
+    @property
+    def use_cookies(self) -> bool:
+        return not self.categories & DomainCategory.NO_COOKIE
+
+    @property
+    def use_match_filter(self) -> bool:
+        return not self.categories & DomainCategory.NO_FILTER
+
+    @property
+    def is_tiktok(self) -> bool:
+        return bool(self.categories & DomainCategory.TIKTOK)
+
+    @property
+    def engine(self) -> Engine:
+        """Download engine (yt-dlp, gallery-dl or yt-dlp with gallery-dl fallback)"""
+        return self.route.engine
+
+    def __repr__(self) -> str:
+        return f"<UrlVerdict {self.host}: {self.categories!r} porn={self.is_porn}>"
+
+
+class UrlClassifier(object):
+    """Cached URL classification over all DomainsConfig lists"""
+
+    def __init__(self, cache_size: int = 50000):
+        self.cache_size = cache_size
+        self.version = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._domain_classifier = None
+        self._engine_router = None
+        self._keyword_matcher = None
+        self._porn_index = None
+
+    def _ensure_loaded(self):
+        """Lists are loaded on first classification, not at import time"""
+        if self._domain_classifier is None:
+            self._domain_classifier = domain_classifier
+        if self._engine_router is None:
+            self._engine_router = engine_router
+        if self._keyword_matcher is None:
+            self._keyword_matcher = load_keyword_matcher()
+        if self._porn_index is None:
+            bloom = load_porn_bloom() if DomainsConfig.PORN_BLOOM_ENABLED else None
+            self._porn_index = PrefilteredDomainIndex(load_porn_domain_index(), bloom)
+
+    def _classify(self, url: str, version: int) -> UrlVerdict:
+        """Classify URL without cache"""
+        self._ensure_loaded()
+        host = get_url_host(url)
+        categories = self._domain_classifier.classify_host(host)
+        porn_domain = None
+        porn_keywords = []
+        if not categories & DomainCategory.WHITELIST:
+            # GREYLIST domains skip porn domains list but are still checked for keywords
+            if not categories & DomainCategory.GREYLIST:
+                porn_domain = self._porn_index.match_host(host)
+            porn_keywords = self._keyword_matcher.matches(url)
+        route = self._engine_router.route(url)
+        return UrlVerdict(url, host, categories, route, porn_domain, porn_keywords, version)
+
+    def classify(self, url: str) -> UrlVerdict:
+        """Get cached verdict for URL"""
+        # Verdict is computed for normalized URL, so every URL with the same key gets the same verdict
+        key = normalize_url(url)
+        with self._lock:
+            version = self.version
+            verdict = self._cache.get(key)
+            if verdict is not None and verdict.version == version:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return verdict
+            self._misses += 1
+
+        verdict = self._classify(key, version)
+        with self._lock:
+            # Lists could be reloaded while classifying, such verdict is returned but not cached
+            if verdict.version == self.version:
+                self._cache[key] = verdict
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return verdict
+
+    def classify_many(self, urls: List[str]) -> List[UrlVerdict]:
+        """
+        Get verdicts for many URLs (playlist, TikTok profile, /img entries) in input order
+        Each unique host is classified and checked against porn domains once, and keywords of all
+        uncached URLs are found in one automaton pass, so cost scales with unique hosts, not entries
+        """
+        keys = [normalize_url(url) for url in urls]
+        verdicts = {}
+        with self._lock:
+            version = self.version
+            for key in keys:
+                if key in verdicts:
+                    continue
+                verdict = self._cache.get(key)
+                if verdict is not None and verdict.version == version:
+                    self._cache.move_to_end(key)
+                    self._hits += 1
+                    verdicts[key] = verdict
+            missing = [key for key in dict.fromkeys(keys) if key not in verdicts]
+            self._misses += len(missing)
+        if not missing:
+            return [verdicts[key] for key in keys]
+
+        self._ensure_loaded()
+        hosts = {}
+        for key in missing:
+            host = get_url_host(key)
+            if host not in hosts:
+                categories = self._domain_classifier.classify_host(host)
+                porn_domain = None
+                if not categories & (DomainCategory.WHITELIST | DomainCategory.GREYLIST):
+                    porn_domain = self._porn_index.match_host(host)
+                hosts[host] = (categories, porn_domain)
+            verdicts[key] = host
+
+        # Keywords are not checked for WHITELIST hosts
+        checked = [key for key in missing if not hosts[verdicts[key]][0] & DomainCategory.WHITELIST]
+        keywords = dict(zip(checked, self._keyword_matcher.matches_many(checked)))
+        for key in missing:
+            host = verdicts[key]
+            categories, porn_domain = hosts[host]
+            verdicts[key] = UrlVerdict(key, host, categories, self._engine_router.route(key),
+                                       porn_domain, keywords.get(key, []), version)
+
+        with self._lock:
+            if version == self.version:
+                for key in missing:
+                    self._cache[key] = verdicts[key]
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return [verdicts[key] for key in keys]
+
+    def bump_version(self) -> int:
+        """Invalidate all cached verdicts (call after domain/keyword lists changed)"""
+        with self._lock:
+            self.version += 1
+            self._cache.clear()
+            return self.version
+
+    def reload_lists(self, domain_classifier: DomainClassifier = None,
+                     keyword_matcher: KeywordMatcher = None) -> int:
+        """
+        Rebuild domain classifier, engine router, keyword matcher and porn domain index, then invalidate cache
+        Returns new lists version
+        """
+        new_domain_classifier = domain_classifier or DomainClassifier.from_config()
+        new_engine_router = EngineRouter.from_config()
+        keyword_matcher = keyword_matcher or load_keyword_matcher()
+        bloom = load_porn_bloom() if DomainsConfig.PORN_BLOOM_ENABLED else None
+        porn_index = PrefilteredDomainIndex(load_porn_domain_index(), bloom)
+        self._domain_classifier = new_domain_classifier
+        self._engine_router = new_engine_router
+        self._keyword_matcher = keyword_matcher
+        self._porn_index = porn_index
+        return self.bump_version()
+
+    def swap_domain_lists(self, domain_classifier: DomainClassifier, engine_router: EngineRouter) -> int:
+        """
+        Use already compiled domain classifier and engine router (keyword matcher and porn index are kept),
+        then invalidate cache. Returns new lists version
+        """
+        self._domain_classifier = domain_classifier
+        self._engine_router = engine_router
+        return self.bump_version()
+
+    def stats(self) -> dict:
+        """Get cache statistics"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / total if total else 0.0,
+                'size': len(self._cache),
+                'version': self.version,
+            }
+
+    def format_stats(self, user_id: int = None) -> str:
+        """Get cache statistics as admin message"""
+        from CONFIG.LANGUAGES.language_router import format_message
+        stats = self.stats()
+        return format_message(
+            'ADMIN_URL_CACHE_STATS_MSG', user_id=user_id,
+            hits=stats['hits'], misses=stats['misses'], hit_rate=f"{stats['hit_rate'] * 100:.1f}",
+            size=stats['size'], version=stats['version']
+        )
+
+
+# Global instance
+url_classifier = UrlClassifier()
+
+
+def classify_url(url: str) -> UrlVerdict:
+    """
+    Convenience function to get cached verdict for URL
+    """
+    return url_classifier.classify(url)
+
+
+def classify_many(urls: List[str]) -> List[UrlVerdict]:
+    """
+    Convenience function to get cached verdicts for many URLs
+    """
+    return url_classifier.classify_many(urls)
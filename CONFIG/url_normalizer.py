@@ -0,0 +1,236 @@
+# URL Normalizer
+# Canonical form of URLs used as download cache keys: different links to the same media
+# (http/https, www./m. hosts, youtu.be/shorts links, tracking parameters, CLEAN_QUERY hosts)
+# map to one key, so more requests end up being sent from cache
+#
+# Self-check and microbenchmark:
+#   python -m CONFIG.url_normalizer
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import List, Optional
+
+from CONFIG.domain_classifier import DomainCategory, domain_classifier, normalize_host
+
+# Host prefixes that serve the same content as the bare domain
+STRIP_HOST_PREFIXES = ('www.', 'm.')
+
+YOUTUBE_HOSTS = ('youtube.com', 'music.youtube.com', 'youtube-nocookie.com')
+YOUTUBE_SHORT_HOSTS = ('youtu.be',)
+# Only these parameters identify a YouTube video, everything else (t, si, feature, pp...) is dropped.
+# Applies to /watch and short video links only, other paths (results, playlist...) keep their query
+YOUTUBE_KEEP_PARAMS = ('v', 'list')
+# /shorts/ID, /live/ID, /embed/ID, /v/ID are the same video as /watch?v=ID
+YOUTUBE_VIDEO_PATHS = ('shorts', 'live', 'embed', 'v')
+# Second segments of video paths that are not video IDs (/embed/videoseries?list=...)
+YOUTUBE_NON_VIDEO_IDS = ('videoseries',)
+
+DEFAULT_PORTS = (80, 443)
+
+# Tracking parameters dropped for every host
+TRACKING_PARAMS = ('fbclid', 'gclid', 'yclid', 'igshid', 'igsh', 'mc_cid', 'mc_eid', '_ga')
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+
+def _strip_host(host: str) -> str:
+    """Drop www./m. prefixes (only if a registrable domain is left)"""
+    for prefix in STRIP_HOST_PREFIXES:
+        if host.startswith(prefix) and '.' in host[len(prefix):]:
+            return host[len(prefix):]
+    return host
+
+
+def _clean_params(query: str) -> List[tuple]:
+    """Parse query and drop tracking parameters"""
+    return [
+        (name, value) for name, value in parse_qsl(query, keep_blank_values=True)
+        if name not in TRACKING_PARAMS and not name.startswith(TRACKING_PARAM_PREFIXES)
+    ]
+
+
+def _normalize_youtube(host: str, path: str, query: str) -> Optional[tuple]:
+    """
+    Canonicalize watch, youtu.be, shorts, live and embed links to youtube.com/watch?v=ID
+    Returns (host, path, query) or None if URL is not a video link
+    """
+    segments = [segment for segment in path.split('/') if segment]
+    if host in YOUTUBE_SHORT_HOSTS:
+        if not segments:
+            return None
+        video_id = segments[0]
+    elif segments == ['watch']:
+        video_id = None
+    elif len(segments) >= 2 and segments[0] in YOUTUBE_VIDEO_PATHS and segments[1] not in YOUTUBE_NON_VIDEO_IDS:
+        video_id = segments[1]
+    else:
+        return None
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    if video_id:
+        params['v'] = video_id
+    kept = [(name, params[name]) for name in YOUTUBE_KEEP_PARAMS if params.get(name)]
+    return 'youtube.com', '/watch', urlencode(kept)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Get canonical form of URL
+    - scheme is https, host is lowercased, default port (80/443), www. and m. are dropped
+    - YouTube video links become youtube.com/watch?v=ID[&list=ID] (watch, youtu.be, shorts, live, embed)
+    - query and fragment are dropped for CLEAN_QUERY hosts, tracking parameters for all hosts
+    - trailing slash of path is dropped
+    """
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url.lstrip('/')
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+
+    host = _strip_host(normalize_host(parts.netloc))
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = f"[{host}]" if ':' in host else host
+    if port and port not in DEFAULT_PORTS:
+        netloc = f"{netloc}:{port}"
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    if host in YOUTUBE_HOSTS or host in YOUTUBE_SHORT_HOSTS:
+        video = _normalize_youtube(host, path, parts.query)
+        if video is not None:
+            return urlunsplit(('https',) + video + ('',))
+
+    if domain_classifier.classify_host(host) & DomainCategory.CLEAN_QUERY:
+        return urlunsplit(('https', netloc, path, '', ''))
+
+    query = urlencode(_clean_params(parts.query)) if parts.query else ''
+    return urlunsplit(('https', netloc, path, query, parts.fragment))
+
+
+# Groups of URLs that must normalize to one key
+_EQUIVALENT_URLS = [
+    [
+        'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+        'http://youtube.com/watch?v=dQw4w9WgXcQ&t=42s',
+        'https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ',
+        'https://youtu.be/dQw4w9WgXcQ?si=abcdef',
+        'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+        'https://www.youtube.com/embed/dQw4w9WgXcQ',
+        'youtube.com/watch?v=dQw4w9WgXcQ#t=10',
+    ],
+    [
+        'https://www.tiktok.com/@user/video/7200000000000000000?is_from_webapp=1&sender_device=pc',
+        'https://m.tiktok.com/@user/video/7200000000000000000/',
+        'https://TikTok.com/@user/video/7200000000000000000#comments',
+    ],
+    [
+        'https://vm.tiktok.com/ZMabcdef/',
+        'https://vm.tiktok.com/ZMabcdef?_r=1',
+    ],
+    [
+        'https://example.com/video?id=1&utm_source=telegram',
+        'https://www.example.com/video/?id=1&fbclid=xyz',
+    ],
+    [
+        'https://example.com/a',
+        'https://example.com:443/a',
+        'http://example.com:80/a',
+    ],
+]
+
+# URLs that must stay distinct
+_DISTINCT_URLS = [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123',
+    'https://www.youtube.com/playlist?list=PL123',
+    'https://example.com/video?id=1',
+    'https://example.com/video?id=2',
+    'https://vk.com/video?z=video-1_2',
+    'https://www.youtube.com/results?search_query=cats',
+    'https://www.youtube.com/results?search_query=dogs',
+    'https://www.youtube.com/embed/videoseries?list=PL1',
+    'https://www.youtube.com/embed/videoseries?list=PL2',
+    'https://example.com/a?id=1',
+    'https://example.com:8443/a?id=1',
+]
+
+# Non-CLEAN_QUERY, non-video paths: any non-tracking parameter is part of the key
+_QUERY_KEY_URLS = [
+    'https://example.com/video',
+    'https://vk.com/video',
+    'https://www.youtube.com/results',
+    'https://www.youtube.com/playlist',
+    'https://www.youtube.com/watch_videos',
+    'https://www.youtube.com/attribution_link',
+    'https://www.youtube.com/embed/videoseries',
+    'https://youtu.be/',
+]
+
+
+def _random_params(count: int, seed: int = 15) -> List[tuple]:
+    """Generate (name, value, other value) of non-tracking parameters"""
+    import random
+    import string
+    rng = random.Random(seed)
+    params = []
+    while len(params) < count:
+        name = ''.join(rng.choice(string.ascii_lowercase + '_') for _ in range(rng.randint(1, 12)))
+        if name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES):
+            continue
+        value = ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(1, 10)))
+        params.append((name, value, value + 'x'))
+    return params
+
+
+def check_properties() -> List[str]:
+    """
+    Check normalizer properties: idempotence, equivalence groups and distinct URLs
+    Returns list of failures (empty if everything holds)
+    """
+    failures = []
+    all_urls = [url for group in _EQUIVALENT_URLS for url in group] + _DISTINCT_URLS
+    for url in all_urls:
+        normalized = normalize_url(url)
+        if normalize_url(normalized) != normalized:
+            failures.append(f"not idempotent: {url} -> {normalized} -> {normalize_url(normalized)}")
+        parts = urlsplit(url if '://' in url else 'https://' + url)
+        variant = urlunsplit(('HTTP', parts.netloc.upper(), parts.path, parts.query, parts.fragment))
+        if normalize_url(variant) != normalized:
+            failures.append(f"depends on scheme or host case: {url}")
+    for group in _EQUIVALENT_URLS:
+        keys = {normalize_url(url) for url in group}
+        if len(keys) != 1:
+            failures.append(f"not equivalent: {sorted(keys)}")
+    keys = [normalize_url(url) for url in _DISTINCT_URLS]
+    if len(set(keys)) != len(keys):
+        failures.append(f"not distinct: {keys}")
+    # Generated: adding or changing a non-tracking parameter must change the key
+    for base in _QUERY_KEY_URLS:
+        for name, value, other in _random_params(50):
+            with_value = normalize_url(f"{base}?{urlencode([(name, value)])}")
+            with_other = normalize_url(f"{base}?{urlencode([(name, other)])}")
+            if with_value == normalize_url(base) or with_value == with_other:
+                failures.append(f"parameter {name} ignored: {base}")
+                break
+    return failures
+
+
+def benchmark(number: int = 20000) -> float:
+    """Microbenchmark, returns microseconds per normalize_url call"""
+    import time
+    urls = [url for group in _EQUIVALENT_URLS for url in group] + _DISTINCT_URLS
+    start = time.perf_counter()
+    for index in range(number):
+        normalize_url(urls[index % len(urls)])
+    return (time.perf_counter() - start) / number * 1e6
+
+
+if __name__ == '__main__':
+    failures = check_properties()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"properties: {'OK' if not failures else f'{len(failures)} failed'}")
+    print(f"normalize_url: {benchmark():.2f} us per call")